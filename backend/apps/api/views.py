@@ -7,18 +7,17 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.http import StreamingHttpResponse
 from django.utils import timezone
-from asgiref.sync import sync_to_async
 from celery.result import AsyncResult
 import logging
 import validators
-import json
+import orjson
 import asyncio
 
 # ✅ Correct Global Imports
 from apps.ingest.models import UploadedFile, GeneratedContent
 from apps.ingest.extractors import TextExtractor, count_words
 from apps.trends.models import TrendArticle
-from apps.trends.vectorstore import get_trend_snippets
+from apps.trends.vectorstore import get_trend_snippets, embed_topic
 from apps.generator import ai_wrapper
 from apps.generator.openai_wrapper import ContentStreamer
 from apps.generator.analytics import UserPatternAnalyzer
@@ -38,6 +37,9 @@ logger = logging.getLogger(__name__)
 
 # --- STREAMING VIEW ---
 
+# ContentStreamer emits orjson-encoded frames, so the final frame always starts with this prefix
+STREAM_DONE_PREFIX = b'data: {"type":"stream_done"'
+
 @api_view(['POST'])
 def generate_content_stream(request):
     """
@@ -51,10 +53,11 @@ def generate_content_stream(request):
         uploaded_file = UploadedFile.objects.get(id=uploaded_file_id)
         extracted_text = uploaded_file.extracted_text
         topic = uploaded_file.detected_topic or "Marketing"
+        topic_embedding = uploaded_file.topic_embedding if uploaded_file.detected_topic else None
     except UploadedFile.DoesNotExist:
         return Response({'error': 'File not found'}, status=404)
 
-    trend_snippets = get_trend_snippets(topic, k=3)
+    trend_snippets = get_trend_snippets(topic, k=3, query_vec=topic_embedding)
     
     visual_task = generate_quote_card.delay(
         text=f"Insights on {topic}", 
@@ -63,18 +66,17 @@ def generate_content_stream(request):
 
     async def event_stream():
         streamer = ContentStreamer()
-        yield f"data: {json.dumps({'type': 'meta', 'visual_job_id': visual_task.id})}\n\n"
+        yield b"data: " + orjson.dumps({'type': 'meta', 'visual_job_id': visual_task.id}) + b"\n\n"
         
         async for chunk in streamer.generate_parallel_stream(extracted_text, trend_snippets, topic):
             yield chunk
             
-            if "stream_done" in chunk:
+            if chunk.startswith(STREAM_DONE_PREFIX):
                 try:
-                    data_str = chunk.replace("data: ", "").strip()
-                    data_json = json.loads(data_str)
+                    data_json = orjson.loads(chunk[len(b"data: "):])
                     final_content = data_json.get('final_db_data')
                     
-                    await sync_to_async(save_generated_content)(
+                    await asave_generated_content(
                         request.user, uploaded_file, final_content, trend_snippets
                     )
                 except Exception as e:
@@ -85,10 +87,13 @@ def generate_content_stream(request):
     response['X-Accel-Buffering'] = 'no'
     return response
 
-def save_generated_content(user, file, content, trends):
+async def asave_generated_content(user, file, content, trends):
     if not user.is_authenticated:
         return
-    GeneratedContent.objects.create(
+    # The stream omits short_blog to halve the final frame; stored rows keep both keys
+    if content is not None:
+        content.setdefault('short_blog', content.get('long_blog'))
+    await GeneratedContent.objects.acreate(
         user=user,
         uploaded_file=file,
         content_json=content,
@@ -402,6 +407,8 @@ def extract_content(request):
         
         word_count = count_words(extracted_text)
         detected_topic = ai_wrapper.extract_topic_from_text(extracted_text)
+        # Embed the topic once here so every later generation skips the trend query embedding
+        topic_embedding = embed_topic(detected_topic) if detected_topic else None
         
         user = request.user if request.user.is_authenticated else None
         uploaded_file_obj = UploadedFile.objects.create(
@@ -412,11 +419,12 @@ def extract_content(request):
             extracted_text=extracted_text,
             word_count=word_count,
             detected_topic=detected_topic,
+            topic_embedding=topic_embedding,
             processed_at=timezone.now()
         )
         if 'file' in data:
             uploaded_file_obj.file = data['file']
-            uploaded_file_obj.save()
+            uploaded_file_obj.save(update_fields=['file'])
         
         serializer = UploadedFileSerializer(uploaded_file_obj)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -7,6 +7,8 @@ import logging
 logger = logging.getLogger(__name__)
 
 AI_PROVIDER = os.getenv('AI_PROVIDER', 'openai').lower()
+# Try the local keyphrase extractor before spending an LLM call on topic detection
+LOCAL_TOPIC_EXTRACTION = os.getenv('LOCAL_TOPIC_EXTRACTION', 'True') == 'True'
 
 
 def generate_content(extracted_text, trend_snippets, platforms, brand_voice=""):
@@ -24,8 +26,14 @@ def generate_content(extracted_text, trend_snippets, platforms, brand_voice=""):
 
 def extract_topic_from_text(text):
     """
-    Extract topic using configured AI provider
+    Extract topic locally when a keyphrase clearly recurs, else via the configured AI provider
     """
+    if LOCAL_TOPIC_EXTRACTION:
+        from .keyphrases import extract_keyphrase
+        topic = extract_keyphrase(text)
+        if topic:
+            return topic
+    
     if AI_PROVIDER == 'openai':
         from .openai_wrapper import extract_topic_from_text_openai
         return extract_topic_from_text_openai(text)
@@ -1,6 +1,6 @@
 import logging
 import os
-import json
+import orjson
 from django.conf import settings
 from apps.ingest.models import GeneratedContent 
 from openai import OpenAI
@@ -45,7 +45,7 @@ class UserPatternAnalyzer:
                 response_format={"type": "json_object"}
             )
             
-            return json.loads(response.choices[0].message.content)
+            return orjson.loads(response.choices[0].message.content)
         except Exception as e:
             logger.error(f"Voice Analysis Failed: {e}")
             return {
@@ -106,7 +106,7 @@ class UserPatternAnalyzer:
         try:
             response = model.generate_content(prompt)
             cleaned_text = response.text.replace('```json', '').replace('```', '').strip()
-            return json.loads(cleaned_text)
+            return orjson.loads(cleaned_text)
         except Exception as e:
             logger.error(f"Gemini Analysis Failed: {e}")
             return {
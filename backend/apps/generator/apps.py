@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class GeneratorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.generator'
+
+    def ready(self):
+        # Warm the OpenAI SDK, pooled clients and tokenizer at worker boot instead of
+        # on the first generation (skipped in DEBUG to keep the autoreloader fast)
+        from . import ai_wrapper
+        if ai_wrapper.AI_PROVIDER == 'openai' and not settings.DEBUG:
+            from . import openai_wrapper  # noqa
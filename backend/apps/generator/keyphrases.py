@@ -0,0 +1,65 @@
+"""
+Local keyphrase extraction for topic detection
+RAKE-style candidate phrases scored by frequency, in pure Python (no model download)
+"""
+import re
+from collections import Counter
+from typing import Optional
+
+# Same window the LLM topic call looks at, a little wider since this costs nothing
+TOPIC_SOURCE_CHARS = 3000
+MIN_PHRASE_WORDS = 2
+MAX_PHRASE_WORDS = 4
+# Confidence gate: the phrase must recur, otherwise the caller asks the LLM
+MIN_PHRASE_COUNT = 3
+
+# Words that end a candidate phrase
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before
+being below between both but by can could did do does doing down during each either even
+every few for from further get gets got had has have having he her here hers him his how i
+if in into is it its itself just let like made make makes many may me might more most much
+must my new no nor not now of off on once one only or other our ours out over own per same
+she should so some such than that the their theirs them then there these they this those
+through to too under until up upon us use used using very via was we well were what when
+where which while who whom why will with within without would yet you your yours
+""".split())
+
+# Words, or any punctuation/digits (which break a phrase like a stopword does).
+# Matched before lowercasing so acronyms ("AI", "UX") can be told apart from short words
+_RE_TOKEN = re.compile(r"[a-z][a-z'-]*|[^\sa-z'-]+", re.IGNORECASE)
+
+
+def extract_keyphrase(text: str) -> Optional[str]:
+    """
+    Most prominent recurring 2-4 word phrase in the text, title-cased, or None when
+    no phrase recurs often enough to be trusted as the topic.
+    """
+    counts = Counter()
+    # Words seen in anything but all caps; the rest are shown as acronyms
+    not_acronyms = set()
+    run = []
+    for token in _RE_TOKEN.findall(text[:TOPIC_SOURCE_CHARS]):
+        word = token.lower()
+        # Short words only count as acronyms (drops "ok", "vs" but keeps "AI", "ML")
+        if token[0].isalpha() and word not in STOPWORDS and (len(word) > 2 or token.isupper()):
+            if not token.isupper():
+                not_acronyms.add(word)
+            run.append(word)
+            continue
+        _count_ngrams(run, counts)
+        run = []
+    _count_ngrams(run, counts)
+
+    candidates = [(count * len(phrase), len(phrase), phrase) for phrase, count in counts.items() if count >= MIN_PHRASE_COUNT]
+    if not candidates:
+        return None
+    # Frequency weighted by length: a longer phrase wins unless a shorter one recurs clearly more
+    _, _, phrase = max(candidates)
+    return " ".join(word.capitalize() if word in not_acronyms else word.upper() for word in phrase)
+
+
+def _count_ngrams(run, counts: Counter):
+    for n in range(MIN_PHRASE_WORDS, min(MAX_PHRASE_WORDS, len(run)) + 1):
+        for i in range(len(run) - n + 1):
+            counts[tuple(run[i:i + n])] += 1
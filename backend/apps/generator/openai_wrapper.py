@@ -4,21 +4,131 @@ Optimized for "Deep-Work" Quality Content using Dedicated Agents & Templates.
 Now powered by TrendMaster V6 Enhanced Master Prompt for market-level content quality.
 """
 import os
+import atexit
 import logging
-import json
 import asyncio
-import concurrent.futures
+import copy
+import hashlib
+import io
 import re
+import threading
+import weakref
+import anyio
+import httpx
+import orjson
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import AsyncGenerator, List, Dict, Any
-from openai import AsyncOpenAI, OpenAI
+from typing import AsyncGenerator, List, Dict, Any, Optional
+from openai import AsyncOpenAI, APIConnectionError, InternalServerError, RateLimitError
 from django.conf import settings
+from django.core.cache import cache
 
 logger = logging.getLogger(__name__)
 
 # Initialize Clients
-aclient = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+# AsyncOpenAI only: HTTP/2 multiplexes concurrent agent calls and token streams over
+# a few TLS connections, and long keepalive avoids re-handshaking between Celery tasks.
+# Sync callers reach the same pool through the shared agents loop (run_client_sync).
+OPENAI_ASYNC_HTTP_LIMITS = httpx.Limits(max_connections=512, max_keepalive_connections=256, keepalive_expiry=300)
+# Non-streaming agents can take well over a minute for 4k-token JSON outputs
+OPENAI_HTTP_TIMEOUT = httpx.Timeout(300.0, connect=5.0)
+
+# httpx async pools are bound to the event loop that opened them, so keep one client per loop
+# (a single lru_cached AsyncOpenAI would break once a second loop used it)
+_aclients = weakref.WeakKeyDictionary()
+
+def get_aclient() -> AsyncOpenAI:
+    """Pooled AsyncOpenAI client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    aclient = _aclients.get(loop)
+    if aclient is None:
+        # retries=0: the OpenAI SDK already retries with backoff; transport retries would compound it
+        transport = httpx.AsyncHTTPTransport(http2=True, retries=0, limits=OPENAI_ASYNC_HTTP_LIMITS)
+        aclient = _aclients[loop] = AsyncOpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            http_client=httpx.AsyncClient(transport=transport, timeout=OPENAI_HTTP_TIMEOUT)
+        )
+    return aclient
+
+# --- CONCURRENCY LIMITS & RATE-LIMIT BACKOFF ---
+# Caps in-flight chat calls per process so bursts don't trip RPM/TPM limits and thrash on 429s
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "32"))
+RATE_LIMIT_RETRIES = 3  # Backoff: 1s, 2s, 4s
+# Worth retrying the whole generation later (Celery autoretry) instead of storing fallbacks
+TRANSIENT_OPENAI_ERRORS = (RateLimitError, APIConnectionError, InternalServerError, httpx.TransportError)
+
+_loop_semaphores = weakref.WeakKeyDictionary()
+
+def _get_semaphore() -> asyncio.Semaphore:
+    # asyncio primitives bind to the first loop that uses them, so keep one per loop
+    loop = asyncio.get_running_loop()
+    semaphore = _loop_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _loop_semaphores[loop] = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+    return semaphore
+
+async def create_chat_completion(**kwargs):
+    """AsyncOpenAI chat.completions.create, bounded and retried on rate limits."""
+    async with _get_semaphore():
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            try:
+                return await get_aclient().chat.completions.create(**kwargs)
+            except RateLimitError:
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+
+def create_chat_completion_sync(**kwargs):
+    """Sync counterpart of create_chat_completion (bounded by the agents loop's semaphore)."""
+    return run_coroutine_sync(create_chat_completion(**kwargs))
+
+# --- SHARED EVENT LOOP FOR SYNC CALLERS (Celery) ---
+_agents_loop = None
+_agents_loop_pid = None
+_agents_loop_lock = threading.Lock()
+
+def run_coroutine_sync(coro):
+    """
+    Run a coroutine from synchronous code (Celery tasks) on a long-lived background
+    loop, so that loop's AsyncOpenAI pool stays warm across tasks.
+    """
+    global _agents_loop, _agents_loop_pid
+    with _agents_loop_lock:
+        if _agents_loop is None or _agents_loop_pid != os.getpid():
+            # (Re)create after fork: a parent's loop thread does not survive into prefork children
+            _agents_loop = asyncio.new_event_loop()
+            _agents_loop_pid = os.getpid()
+            threading.Thread(target=_agents_loop.run_forever, name="openai-agents-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _agents_loop).result()
+
+def run_client_sync(call):
+    """
+    Run `call(aclient)` (returning an SDK awaitable) from sync code on the agents loop,
+    e.g. run_client_sync(lambda c: c.files.create(...)).
+    """
+    async def _run():
+        return await call(get_aclient())
+    return run_coroutine_sync(_run())
+
+def warm_clients():
+    """Start the agents loop and build its pooled client up front (Celery worker_process_init)."""
+    async def _warm():
+        get_aclient()
+        _get_semaphore()
+    run_coroutine_sync(_warm())
+
+def close_clients():
+    """Release pooled OpenAI connections on process shutdown."""
+    try:
+        loop = _agents_loop
+        if loop is not None and _agents_loop_pid == os.getpid() and loop.is_running():
+            aclient = _aclients.get(loop)
+            if aclient is not None:
+                asyncio.run_coroutine_threadsafe(aclient.close(), loop).result(timeout=5)
+    except Exception as e:
+        logger.warning(f"Error closing OpenAI clients: {e}")
+
+atexit.register(close_clients)
 
 # --- MASTER PROMPT LOADER ---
 def _load_master_prompt() -> str:
@@ -42,532 +152,842 @@ def _load_master_prompt() -> str:
 # Load master prompt once at module initialization
 MASTER_PROMPT = _load_master_prompt()
 
+def _load_token_encoding():
+    """
+    Build the gpt-4o tokenizer up front; tiktoken downloads and parses the
+    BPE ranks lazily, which would otherwise land on the first request.
+    """
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model("gpt-4o")
+    except Exception as e:
+        logger.warning(f"tiktoken encoder unavailable: {e}")
+        return None
+
+TOKEN_ENCODING = _load_token_encoding()
+
+# Agents see at most this many tokens of the uploaded source material
+AGENT_SOURCE_TOKENS = 3000
+
+def truncate_to_tokens(text: str, limit: int) -> str:
+    """Cut text to `limit` gpt-4o tokens (about 4 chars per token if tiktoken is missing)."""
+    if TOKEN_ENCODING is None:
+        return text[:limit * 4]
+    # Only tokenize a generous prefix; real text averages well under 10 chars per token
+    text = text[:limit * 10]
+    tokens = TOKEN_ENCODING.encode_ordinary(text)
+    if len(tokens) <= limit:
+        return text
+    return TOKEN_ENCODING.decode(tokens[:limit])
+
+# --- PROMPT CACHING ---
+# MASTER_PROMPT (~15k tokens) is sent as its own, byte-identical first system message so
+# OpenAI's automatic prefix cache can reuse it; per-agent task text follows in a second one.
+MASTER_SYSTEM_MESSAGES = ({"role": "system", "content": MASTER_PROMPT},) if MASTER_PROMPT else ()
+PROMPT_CACHE_KEY_PREFIX = "trendmaster-v6"
+
+def system_prefix(task_prompt: str) -> tuple:
+    """Cached master prefix + agent task as system messages (built once at import)."""
+    return (*MASTER_SYSTEM_MESSAGES, {"role": "system", "content": task_prompt})
+
+def brand_voice_message(brand_voice: str) -> Dict[str, str]:
+    return {
+        "role": "system",
+        "content": (
+            "### CRITICAL: BRAND VOICE INSTRUCTIONS ###\n"
+            f"You MUST adhere to the following tone, style, and directives:\n{brand_voice}\n"
+            "Ignore any default generic AI tone. Sound like THIS brand.\n"
+        )
+    }
+
+def agent_messages(system: tuple, user_prompt: str, brand_voice: str = "") -> List[Dict[str, str]]:
+    """
+    Prebuilt system prefix + optional brand voice + user content. Brand voice is its
+    own message after the prefix so the cached prefix stays byte-identical per agent.
+    """
+    messages = [*system]
+    if brand_voice:
+        messages.append(brand_voice_message(brand_voice))
+    messages.append({"role": "user", "content": user_prompt})
+    return messages
+
+def prompt_cache_key(agent: str) -> str:
+    return f"{PROMPT_CACHE_KEY_PREFIX}-{agent}"
+
+def as_sdk_kwargs(body: Dict) -> Dict:
+    """
+    Convert a raw chat.completions body into SDK kwargs; prompt_cache_key goes
+    through extra_body so older pinned SDK versions accept it.
+    """
+    kwargs = dict(body)
+    cache_key = kwargs.pop('prompt_cache_key', None)
+    if cache_key:
+        kwargs['extra_body'] = {'prompt_cache_key': cache_key}
+    return kwargs
+
+# --- BLOG PROMPT TEMPLATES (shared by the streaming and Celery agents) ---
+# Built once; the task prompt stays byte-identical across calls so the
+# provider-side prompt cache can reuse it.
+
+_BLOG_MASTER_TASK = (
+    "=============================================================================\n"
+    "TASK: Generate a BLOG/ARTICLE following the TrendMaster V6 specifications.\n"
+    "Focus on the 'BLOG/ARTICLE (Authority Architecture)' section.\n"
+    "=============================================================================\n\n"
+    "CRITICAL REQUIREMENTS:\n"
+    "1. Apply ALL 10 Commandments (Hook Engineering, Villain Framing, etc.)\n"
+    "2. Use the Headline Engineering formula\n"
+    "3. Follow the Opening Section structure (200-300 words)\n"
+    "4. Structure Main Content with chapter-style H2 headers\n"
+    "5. Include Named Frameworks, Proof Stacking, and Visual Elements\n"
+    "6. Apply SEO Optimization Checklist\n"
+    "7. Length: 1,800-2,500 words minimum for authority positioning\n"
+    "8. Tone: Professional yet conversational, data-backed, contrarian where appropriate\n"
+)
+
+_BLOG_FALLBACK_TASK = (
+    "You are an elite SEO Content Writer. Write a definitive, deep-dive article (1,800+ words) "
+    "following this STRICT template:\n\n"
+    "Title: Compelling, specific, includes the promise.\n"
+    "Introduction: Hook + Problem + Promise (What the reader will learn).\n"
+    "Section 1 - Context/Background: Explain the problem space. Provide stats/insights.\n"
+    "Section 2 - Main Concepts/Framework: Use <h3> headings for steps (e.g., 'Step 1: Research'). "
+    "For EACH step, include: What it is + Why it matters + Example + Action Items.\n"
+    "Section 3 - Tools & Resources: Tech stack, templates, or playbooks.\n"
+    "Conclusion: Final takeaway + Short summary of key points.\n"
+    "CTA: Encouraging next step.\n\n"
+    "Tone: Professional, authoritative, yet accessible.\n"
+)
+
+_BLOG_TASK = _BLOG_MASTER_TASK if MASTER_PROMPT else _BLOG_FALLBACK_TASK
+
+# Streaming agent: raw HTML tokens
+BLOG_HTML_SYSTEM_PROMPT = (
+    f"{_BLOG_TASK}"
+    "Output Format: Return ONLY the HTML content (use <h2>, <h3>, <p>, <ul>, <li>, <strong>). "
+    "Do NOT use <html>, <head>, or <body> tags.\n"
+)
+
+# Celery agent: JSON envelope (brand voice, if any, follows as its own message)
+BLOG_JSON_SYSTEM_PROMPT = (
+    f"{_BLOG_TASK}"
+    "Format: HTML (<h2>, <h3>, <p>, <ul>, <li>, <strong>). Do NOT use <html>, <head>, or <body> tags."
+    "\n\nReturn JSON with keys: 'title', 'html_content'."
+)
+
+# --- CELERY AGENT PROMPT TEMPLATES (JSON output; brand voice goes in its own message) ---
+
+_YOUTUBE_MASTER_TASK = (
+    "=============================================================================\n"
+    "TASK: Generate YOUTUBE SCRIPT following TrendMaster V6 specifications.\n"
+    "=============================================================================\n\n"
+    "Apply the 'YOUTUBE SCRIPT (Cinematic Performance Blueprint)' section:\n"
+    "- Use Cold Open pattern (0:00-0:03)\n"
+    "- Follow Chapter-Based Structure\n"
+    "- Include Retention Mechanisms every 45-60 seconds\n"
+    "- Add [VISUAL], [AUDIO], and [RETENTION HOOK] cues\n"
+    "- Apply all 10 Commandments\n"
+    "\n\nReturn JSON with keys: 'title', 'script', 'description'."
+)
+
+_YOUTUBE_FALLBACK_TASK = (
+    "You are a YouTube Scriptwriter for channels like MrBeast or Ali Abdaal. "
+    "Write a FULL 10-minute video script (approx 1,500 words) using this Engaging Structure:\n\n"
+    "1. **INTRO (10-15 sec)**: Hook question / bold statement + Introduce self & purpose.\n"
+    "2. **STORY/PROBLEM (30-60 sec)**: Explain the scenario & why it matters.\n"
+    "3. **MAIN CONTENT (3-6 Points)**: Detailed steps/framework. Each part includes Explanation + Example.\n"
+    "4. **KEY TAKEAWAYS (10-20 sec)**: Rapid summary.\n"
+    "5. **CTA (10-15 sec)**: Subscribe/Like/Comment.\n"
+    "6. **OUTRO**: Offer value or teaser.\n\n"
+    "CRITICAL: You MUST include production notes in brackets like [VISUAL: Stock charts], [SOUND: Cash register], [TEXT OVERLAY]. "
+    "\n\nReturn JSON with keys: 'title', 'script', 'description'."
+)
+
+YOUTUBE_JSON_SYSTEM_PROMPT = _YOUTUBE_MASTER_TASK if MASTER_PROMPT else _YOUTUBE_FALLBACK_TASK
+
+_SOCIAL_MASTER_TASK = (
+    "=============================================================================\n"
+    "TASK: Generate LINKEDIN and TWITTER content following TrendMaster V6 specifications.\n"
+    "=============================================================================\n\n"
+    "PLATFORMS:\n"
+    "1. LINKEDIN - Apply 'LINKEDIN (Authority + Demand Gen Engine)' blueprint\n"
+    "2. TWITTER - Apply 'TWITTER/X THREAD (Viral Density Engine)' blueprint\n\n"
+    "REQUIREMENTS:\n"
+    "- Use ALL 10 Commandments\n"
+    "- Apply Hook Formulas specified for each platform\n"
+    "- Include psychographic triggers\n"
+    "- Zero banned words\n"
+    "- Specific CTAs (never generic)\n"
+    "\n\nReturn JSON: {'linkedin': {'post_text': '...', 'hashtags': [...], 'cta': '...'}, 'twitter_thread': [...]}"
+)
+
+_SOCIAL_FALLBACK_TASK = (
+    "You are a specialized Social Media Ghostwriter. Generate high-engagement text. "
+    "Return strictly valid JSON with keys: 'linkedin', 'twitter_thread'.\n\n"
+
+    "1. **LINKEDIN POST** (Professional & Storytelling):\n"
+    "   - Hook (1-2 lines): Bold insight or surprising fact.\n"
+    "   - Context (2-4 lines): Describe situation/problem.\n"
+    "   - Insight/Solution (3-6 lines): What changed/learned.\n"
+    "   - Takeaway (1-3 lines): Clear learnable outcome.\n"
+    "   - CTA: Question for engagement.\n"
+    "   - Hashtags: 6-10 relevant tags.\n"
+    "   - Keys needed: 'post_text', 'hashtags', 'cta'.\n\n"
+
+    "2. **TWITTER THREAD** (Concise & Punchy):\n"
+    "   - 10-15 Tweets total.\n"
+    "   - Tweet 1: Hook + Value (e.g. 'Consistency beats talent').\n"
+    "   - Body: Step-by-step breakdown. One main point per tweet.\n"
+    "   - Format: Use emojis and arrows (->) for readability.\n"
+    "   - Final Tweet: Summary + CTA.\n"
+    "   - Return as array of strings."
+)
+
+SOCIAL_JSON_SYSTEM_PROMPT = _SOCIAL_MASTER_TASK if MASTER_PROMPT else _SOCIAL_FALLBACK_TASK
+
+_EMAIL_MASTER_TASK = (
+    "=============================================================================\n"
+    "TASK: Generate EMAIL NEWSLETTER following TrendMaster V6 specifications.\n"
+    "=============================================================================\n\n"
+    "Apply the 'EMAIL NEWSLETTER (Inbox-to-Action Pipeline)' blueprint:\n"
+    "- Subject Line formulas (40-50 chars)\n"
+    "- Preheader technique\n"
+    "- Email Body Structure with Hook + Value Core + CTA\n"
+    "- Design Specifications (600px, inline CSS)\n"
+    "- Apply all 10 Commandments\n"
+    "\n\nReturn JSON with keys: 'subject', 'preheader', 'html_body', 'plain_text'."
+)
+
+_EMAIL_FALLBACK_TASK = (
+    "You are an expert Email Marketing Copywriter. Create a professional, engaging email newsletter "
+    "using proven email marketing best practices.\n\n"
+    "Structure:\n"
+    "1. **SUBJECT LINE**: Compelling, curiosity-driven, 40-60 characters. Promise value.\n"
+    "2. **PREHEADER**: Supporting text that complements subject (40-100 chars).\n"
+    "3. **EMAIL BODY** (HTML Format):\n"
+    "   - Personalized greeting: 'Hi there,' or 'Hey [Name],'\n"
+    "   - Hook paragraph: Start with a relatable problem or question\n"
+    "   - Main content: 3-5 key insights or tips. Use <h2> for sections.\n"
+    "   - Each section should have: Clear headline + 2-3 paragraphs + bullet points if applicable\n"
+    "   - Visual breaks: Use horizontal rules <hr> between sections\n"
+    "   - CTA Button: Include a clear call-to-action in a styled button\n"
+    "   - Footer: Include unsubscribe link and company info placeholder\n"
+    "4. **PLAIN TEXT VERSION**: Text-only version of the email for email clients that don't support HTML\n\n"
+    "Styling Guidelines:\n"
+    "- Use inline CSS styles for email compatibility\n"
+    "- Keep width to 600px max\n"
+    "- Use safe fonts: Arial, Helvetica, sans-serif\n"
+    "- Include responsive meta tags\n"
+    "- Professional color scheme (primary: #4F46E5, text: #1F2937)\n"
+    "\n\nReturn JSON with keys: 'subject', 'preheader', 'html_body', 'plain_text'."
+)
+
+EMAIL_JSON_SYSTEM_PROMPT = _EMAIL_MASTER_TASK if MASTER_PROMPT else _EMAIL_FALLBACK_TASK
+
+# --- STREAMING SOCIAL PROMPT TEMPLATES ---
+
+_STREAM_SOCIAL_MASTER_TASK = (
+    "=============================================================================\n"
+    "TASK: Generate social media content for ALL PLATFORMS following the master prompt specifications.\n"
+    "=============================================================================\n\n"
+    "PLATFORMS TO GENERATE:\n"
+    "1. LINKEDIN - Use 'LINKEDIN (Authority + Demand Gen Engine)' section\n"
+    "2. TWITTER/X THREAD - Use 'TWITTER/X THREAD (Viral Density Engine)' section\n"
+    "3. YOUTUBE SCRIPT - Use 'YOUTUBE SCRIPT (Cinematic Performance Blueprint)' section\n"
+    "4. EMAIL NEWSLETTER - Use 'EMAIL NEWSLETTER (Inbox-to-Action Pipeline)' section\n\n"
+    "CRITICAL REQUIREMENTS:\n"
+    "1. Apply ALL 10 Commandments to every platform\n"
+    "2. Use platform-specific formulas and structures exactly as specified\n"
+    "3. Include psychographic triggers (2-3 per piece)\n"
+    "4. ZERO banned words - use power word replacements\n"
+    "5. Follow character/length requirements for each platform\n"
+    "6. Include specific CTAs (never generic)\n\n"
+    "OUTPUT FORMAT - Return strictly valid JSON with these keys:\n"
+    "{\n"
+    '  "linkedin": {"post_text": "...", "hashtags": [...], "cta": "..."},\n'
+    '  "x_thread": ["tweet1", "tweet2", ...],\n'
+    '  "youtube": {"title": "...", "script": "...", "description": "..."},\n'
+    '  "email_newsletter": {"subject": "...", "preheader": "...", "html_body": "...", "plain_text": "..."}\n'
+    "}"
+)
+
+_STREAM_SOCIAL_FALLBACK_TASK = (
+    "You are a Viral Social Media Strategist. Generate content adhering to these specific templates.\n"
+    "Return strictly valid JSON with keys: 'linkedin', 'x_thread', 'threads_post', 'youtube', 'email_newsletter'.\n\n"
+
+    "1. **LINKEDIN** (Professional & Storytelling):\n"
+    "- **Hook** (1-2 lines): Bold insight, question, or surprising fact.\n"
+    "- **Context** (2-4 lines): Describe the situation/problem ('Last week...').\n"
+    "- **Insight/Solution** (3-6 lines): What changed or was learned.\n"
+    "- **Takeaway** (1-3 lines): Clear learnable outcome.\n"
+    "- **CTA**: Engaging question.\n"
+    "- **Hashtags**: 6-10 relevant tags.\n"
+    "- **Keys**: post_text, hashtags, cta.\n\n"
+
+    "2. **X/TWITTER THREAD** (Concise & Punchy):\n"
+    "- Tweet 1: Hook + Value (e.g., 'Consistency beats talent').\n"
+    "- Tweets 2-N: The Lesson/Steps (One main point per tweet). Use arrows (→) and short sentences.\n"
+    "- Final Tweet: Summary + CTA (Follow/Retweet).\n\n"
+
+    "4. **EMAIL NEWSLETTER** (Professional Format):\n"
+    "- **Subject**: Compelling subject line (40-60 chars).\n"
+    "- **Preheader**: Supporting text (40-100 chars).\n"
+    "- **HTML Body**: Greeting + Hook + 3-5 key insights with <h2> headings + CTA.\n"
+    "- **Plain Text**: Text-only version.\n"
+    "- Use inline CSS, 600px width, professional styling.\n\n"
+
+    "3. **YOUTUBE SCRIPT** (Engaging Video Structure):\n"
+    "- **Intro** (10-15s): Hook question + Self-intro + Purpose.\n"
+    "- **Problem/Story** (30-60s): The scenario and why it matters.\n"
+    "- **Main Content** (3-6 points): Steps/Framework. Each part needs Explanation + Example.\n"
+    "- **Key Takeaways** (10-20s).\n"
+    "- **CTA** (10-15s): Subscribe/Comment.\n"
+    "- Include [VISUAL CUE] and [SOUND EFFECT] notes in brackets."
+)
+
+SOCIAL_STREAM_SYSTEM_PROMPT = _STREAM_SOCIAL_MASTER_TASK if MASTER_PROMPT else _STREAM_SOCIAL_FALLBACK_TASK
+
+# --- PREBUILT SYSTEM PREFIXES ---
+# Every call shares these message dicts instead of rebuilding the system prompts
+STREAM_BLOG_SYSTEM = system_prefix(BLOG_HTML_SYSTEM_PROMPT)
+STREAM_SOCIAL_SYSTEM = system_prefix(SOCIAL_STREAM_SYSTEM_PROMPT)
+AGENT_SYSTEM_MESSAGES = {
+    'blog': system_prefix(BLOG_JSON_SYSTEM_PROMPT),
+    'youtube': system_prefix(YOUTUBE_JSON_SYSTEM_PROMPT),
+    'social': system_prefix(SOCIAL_JSON_SYSTEM_PROMPT),
+    'email': system_prefix(EMAIL_JSON_SYSTEM_PROMPT),
+}
+
+# Single-call alternative to the four Celery agents (OPENAI_UNIFIED_AGENT)
+UNIFIED_JSON_SYSTEM_PROMPT = (
+    "Produce ALL FOUR deliverables below in ONE response.\n\n"
+    f"### BLOG ###\n{BLOG_JSON_SYSTEM_PROMPT}\n\n"
+    f"### YOUTUBE ###\n{YOUTUBE_JSON_SYSTEM_PROMPT}\n\n"
+    f"### SOCIAL ###\n{SOCIAL_JSON_SYSTEM_PROMPT}\n\n"
+    f"### EMAIL ###\n{EMAIL_JSON_SYSTEM_PROMPT}\n\n"
+    "Return ONE JSON object with keys 'blog', 'youtube', 'social', 'email', "
+    "each holding exactly the JSON its section asks for."
+)
+UNIFIED_SYSTEM = system_prefix(UNIFIED_JSON_SYSTEM_PROMPT)
+
+_RE_FENCE_JSON = re.compile(r'```json\s*')
+_RE_FENCE = re.compile(r'```\s*')
+
 def clean_json_response(content: str) -> str:
     """
     Robustly cleans AI response to ensure valid JSON.
     Removes markdown code blocks and whitespace.
     """
     try:
+        # json_object responses are normally unfenced; skip both regex passes
+        if '```' not in content:
+            return content.strip()
         # Remove markdown code blocks (```json ... ```)
-        content = re.sub(r'```json\s*', '', content)
-        content = re.sub(r'```\s*', '', content)
-        return content.strip()
+        return _RE_FENCE.sub('', _RE_FENCE_JSON.sub('', content)).strip()
     except Exception as e:
         logger.error(f"JSON cleaning error: {e}")
         return content
 
+# Characters that can change the scanner state; the regex skips everything in between
+_RE_JSON_STRUCTURAL = re.compile(r'[\\"{}\[\],]')
+
+
+class JSONMemberScanner:
+    """
+    Incrementally scans a streamed JSON object and returns each top-level
+    member (key, value) as soon as its value is fully closed. Members named in
+    `item_keys` whose value is an array also report each element as it closes.
+    """
+    
+    def __init__(self, item_keys=()):
+        self._chunks = []
+        # Unscanned tail of the stream; the prefix is dropped once its members are decoded
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = -1  # Buffer index of the character after a backslash
+        self._member_start = 0
+        self._item_keys = frozenset(item_keys)
+        self._item_key = None  # Streamed array currently being scanned
+        self._item_index = 0
+        self._item_start = 0
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> List[tuple]:
+        """
+        Returns ("member", key, value) and ("item", key, index, value) events
+        for everything that closed within this chunk.
+        """
+        self._chunks.append(chunk)
+        self._buf += chunk
+        buf = self._buf
+        events = []
+        
+        for match in _RE_JSON_STRUCTURAL.finditer(buf, self._pos):
+            i = match.start()
+            ch = buf[i]
+            if self._in_string:
+                if i == self._escaped:
+                    continue
+                if ch == '\\':
+                    self._escaped = i + 1
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = i + 1
+                elif self._depth == 2 and ch == '[' and self._item_keys:
+                    self._open_items(i)
+            elif ch in '}]':
+                if self._depth == 2 and self._item_key is not None:
+                    events.extend(self._close_item(i))
+                    self._item_key = None
+                elif self._depth == 1:
+                    events.extend(self._close_member(i))
+                self._depth -= 1
+            elif ch == ',':
+                if self._depth == 1:
+                    events.extend(self._close_member(i))
+                elif self._depth == 2 and self._item_key is not None:
+                    events.extend(self._close_item(i))
+        
+        # Keep only the member still open, so later chunks don't re-copy decoded text
+        cut = self._member_start
+        self._buf = buf[cut:]
+        self._pos = len(buf) - cut
+        self._member_start = 0
+        self._item_start -= cut
+        self._escaped -= cut
+        return events
+
+    def _open_items(self, start: int):
+        key_text = self._buf[self._member_start:start].strip().rstrip(':').strip()
+        try:
+            key = orjson.loads(key_text)
+        except orjson.JSONDecodeError:
+            return
+        if key in self._item_keys:
+            self._item_key = key
+            self._item_index = 0
+            self._item_start = start + 1
+
+    def _close_item(self, end: int) -> List[tuple]:
+        segment = self._buf[self._item_start:end].strip()
+        self._item_start = end + 1
+        if not segment:
+            return []
+        try:
+            value = orjson.loads(segment)
+        except orjson.JSONDecodeError:
+            return []
+        index = self._item_index
+        self._item_index += 1
+        return [("item", self._item_key, index, value)]
+
+    def _close_member(self, end: int) -> List[tuple]:
+        segment = self._buf[self._member_start:end]
+        self._member_start = end + 1
+        if not segment.strip():
+            return []
+        try:
+            return [("member", key, value) for key, value in orjson.loads("{" + segment + "}").items()]
+        except orjson.JSONDecodeError:
+            return []
+
 # --- STREAMING CLASS (Restored & Upgraded) ---
 
+# Bounded agent -> SSE buffer: a slow client blocks the agents' sends, which stops them
+# reading the OpenAI stream, instead of piling up undelivered deltas in memory
+STREAM_BUFFER_SIZE = int(os.getenv("STREAM_BUFFER_SIZE", "256"))
+# Blog tokens coalesced into one SSE frame (cuts frame count ~10x)
+BLOG_DELTA_BATCH = 12
+
+@dataclass(slots=True)
+class BlogContent:
+    html: str = ""
+    title: str = ""
+    word_count: int = 0
+
+
+@dataclass(slots=True)
+class StreamedContent:
+    """
+    Accumulated streamer output (serialized as-is by orjson for final_db_data).
+    Social fields hold whatever dict/list shape the model returned.
+    """
+    long_blog: BlogContent = field(default_factory=BlogContent)
+    linkedin: Dict = field(default_factory=lambda: {"post_text": "", "hashtags": []})
+    x_thread: List = field(default_factory=list)
+    threads: List = field(default_factory=list)
+    youtube: Dict = field(default_factory=lambda: {"title": "", "script": "", "description": ""})
+    email_newsletter: Dict = field(default_factory=lambda: {
+        "subject": "", "preheader": "", "html_body": "", "plain_text": ""
+    })
+    meta: Dict = field(default_factory=dict)
+
+
 class ContentStreamer:
     """
     Manages parallel generation streams with Template-Based Prompts.
     """
     
     def __init__(self):
-        self.queue = asyncio.Queue()
-        self.final_content = {
-            "long_blog": {"html": "", "title": "", "word_count": 0},
-            "linkedin": {"post_text": "", "hashtags": []},
-            "x_thread": [],
-            "threads": [],
-            "youtube": {"title": "", "script": "", "description": ""},
-            "short_blog": {"html": "", "title": "", "word_count": 0},
-            "email_newsletter": {"subject": "", "preheader": "", "html_body": "", "plain_text": ""},
-            "meta": {}
-        }
-
-    async def _stream_blog_agent(self, context: str, topic: str):
+        self.final_content = StreamedContent()
+
+    @staticmethod
+    async def _emit(send, item: Dict[str, Any]):
+        """Send without yielding to the loop unless the stream buffer is full."""
+        try:
+            send.send_nowait(item)
+        except anyio.WouldBlock:
+            await send.send(item)
+
+    @staticmethod
+    async def _run_agent(send, agent, *args):
+        # Closing the agent's send clone (even on failure) is what ends the fan-in loop
+        async with send:
+            await agent(send, *args)
+
+    async def _emit_blog_delta(self, send, deltas: List[str], pending: List[str]):
+        # One joined string serves both the SSE frame and the html accumulator
+        delta = "".join(pending)
+        pending.clear()
+        deltas.append(delta)
+        await self._emit(send, {"type": "blog_delta", "content": delta})
+
+    async def _stream_blog_agent(self, send, context: str, topic: str):
         """
         The 'Authority' Agent: Generates blog posts using TrendMaster V6 master prompt.
         Follows professional copywriting formulas for maximum engagement and authority.
         """
-        # Use master prompt if available, otherwise fallback to basic template
-        if MASTER_PROMPT:
-            system_prompt = (
-                f"{MASTER_PROMPT}\n\n"
-                "=============================================================================\n"
-                "TASK: Generate a BLOG/ARTICLE following the detailed specifications in the master prompt.\n"
-                "Focus on the 'BLOG/ARTICLE (Authority Architecture)' section.\n"
-                "=============================================================================\n\n"
-                "CRITICAL REQUIREMENTS:\n"
-                "1. Apply ALL 10 Commandments (Hook Engineering, Villain Framing, etc.)\n"
-                "2. Use the Headline Engineering formula\n"
-                "3. Follow the Opening Section structure (200-300 words)\n"
-                "4. Structure Main Content with chapter-style H2 headers\n"
-                "5. Include Named Frameworks, Proof Stacking, and Visual Elements\n"
-                "6. Apply SEO Optimization Checklist\n"
-                "7. Output Format: Return ONLY the HTML content (use <h2>, <h3>, <p>, <ul>, <li>, <strong>)\n"
-                "8. Do NOT use <html>, <head>, or <body> tags\n"
-                "9. Length: 1,800-2,500 words minimum for authority positioning\n"
-                "10. Tone: Professional yet conversational, data-backed, contrarian where appropriate\n"
-            )
-        else:
-            # Fallback to original prompt if master prompt fails to load
-            system_prompt = (
-                "You are an elite SEO Content Writer. Write a blog post following this STRICT template:\n\n"
-                "**Title**: Compelling, specific, includes the promise.\n"
-                "**Introduction**: Hook + Problem + Promise (What the reader will learn).\n"
-                "**Section 1 - Context/Background**: Explain the problem space. Provide stats/insights.\n"
-                "**Section 2 - Main Concepts/Framework**: Use <h3> headings for steps (e.g., 'Step 1: Research'). "
-                "For EACH step, include: What it is + Why it matters + Example + Action Items.\n"
-                "**Section 3 - Tools & Resources**: Tech stack, templates, or playbooks.\n"
-                "**Conclusion**: Final takeaway + Short summary of key points.\n"
-                "**CTA**: Encouraging next step.\n\n"
-                "Format: HTML (<h3>, <p>, <ul>, <li>, <strong>). Do NOT use <html> or <body> tags. "
-                "Tone: Professional, authoritative, yet accessible."
-            )
-        
         user_prompt = f"TOPIC: {topic}\n\nRESEARCH CONTEXT:\n{context}\n\nWrite the full article now:"
+        deltas = []  # Emitted delta strings, reused as the html accumulator and joined once at the end
+        pending = []
         
         try:
-            stream = await aclient.chat.completions.create(
+            stream = await create_chat_completion(
                 model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                stream=True
+                messages=agent_messages(STREAM_BLOG_SYSTEM, user_prompt),
+                stream=True,
+                extra_body={"prompt_cache_key": prompt_cache_key("stream-blog")}
             )
             
+            word_count = 0
+            in_word = False  # Whether the previous token ended mid-word
             async for chunk in stream:
                 if chunk.choices[0].delta.content:
                     token = chunk.choices[0].delta.content
-                    self.final_content["long_blog"]["html"] += token
                     
-                    await self.queue.put({
-                        "type": "blog_delta", 
-                        "content": token
-                    })
+                    # Running word count (a word split across tokens counts once)
+                    words = token.split()
+                    if words:
+                        word_count += len(words)
+                        if in_word and not token[0].isspace():
+                            word_count -= 1
+                    in_word = not token[-1].isspace()
+                    
+                    pending.append(token)
+                    if len(pending) >= BLOG_DELTA_BATCH:
+                        await self._emit_blog_delta(send, deltas, pending)
+            
+            if pending:
+                await self._emit_blog_delta(send, deltas, pending)
             
             # Metadata calculation
-            full_html = self.final_content["long_blog"]["html"]
-            word_count = len(full_html.split())
-            self.final_content["long_blog"]["word_count"] = word_count
-            self.final_content["long_blog"]["title"] = f"Guide: {topic}"
+            self.final_content.long_blog.html = "".join(deltas)
+            self.final_content.long_blog.word_count = word_count
+            self.final_content.long_blog.title = f"Guide: {topic}"
             
-            await self.queue.put({"type": "blog_done"})
+            await self._emit(send, {"type": "blog_done"})
             
         except Exception as e:
             logger.error(f"Blog Agent Failed: {e}")
-            await self.queue.put({"type": "error", "message": "Blog generation failed"})
+            self.final_content.long_blog.html = "".join(deltas) + "".join(pending)
+            await self._emit(send, {"type": "error", "message": "Blog generation failed"})
 
-    async def _stream_social_agent(self, context: str):
+    async def _stream_social_agent(self, send, context: str):
         """
         The 'Viral' Agent: Generates social assets using TrendMaster V6 master prompt.
         Applies platform-specific engineering blueprints for maximum engagement.
         """
-        # Use master prompt if available, otherwise fallback to basic template
-        if MASTER_PROMPT:
-            system_prompt = (
-                f"{MASTER_PROMPT}\n\n"
-                "=============================================================================\n"
-                "TASK: Generate social media content for ALL PLATFORMS following the master prompt specifications.\n"
-                "=============================================================================\n\n"
-                "PLATFORMS TO GENERATE:\n"
-                "1. LINKEDIN - Use 'LINKEDIN (Authority + Demand Gen Engine)' section\n"
-                "2. TWITTER/X THREAD - Use 'TWITTER/X THREAD (Viral Density Engine)' section\n"
-                "3. YOUTUBE SCRIPT - Use 'YOUTUBE SCRIPT (Cinematic Performance Blueprint)' section\n"
-                "4. EMAIL NEWSLETTER - Use 'EMAIL NEWSLETTER (Inbox-to-Action Pipeline)' section\n\n"
-                "CRITICAL REQUIREMENTS:\n"
-                "1. Apply ALL 10 Commandments to every platform\n"
-                "2. Use platform-specific formulas and structures exactly as specified\n"
-                "3. Include psychographic triggers (2-3 per piece)\n"
-                "4. ZERO banned words - use power word replacements\n"
-                "5. Follow character/length requirements for each platform\n"
-                "6. Include specific CTAs (never generic)\n\n"
-                "OUTPUT FORMAT - Return strictly valid JSON with these keys:\n"
-                "{\n"
-                '  "linkedin": {"post_text": "...", "hashtags": [...], "cta": "..."},\n'
-                '  "x_thread": ["tweet1", "tweet2", ...],\n'
-                '  "youtube": {"title": "...", "script": "...", "description": "..."},\n'
-                '  "email_newsletter": {"subject": "...", "preheader": "...", "html_body": "...", "plain_text": "..."}\n'
-                "}"
-            )
-        else:
-            # Fallback to original prompt if master prompt fails to load
-            system_prompt = (
-                "You are a Viral Social Media Strategist. Generate content adhering to these specific templates.\n"
-                "Return strictly valid JSON with keys: 'linkedin', 'x_thread', 'threads_post', 'youtube', 'email_newsletter'.\n\n"
-                
-                "1. **LINKEDIN** (Professional & Storytelling):\n"
-                "- **Hook** (1-2 lines): Bold insight, question, or surprising fact.\n"
-                "- **Context** (2-4 lines): Describe the situation/problem ('Last week...').\n"
-                "- **Insight/Solution** (3-6 lines): What changed or was learned.\n"
-                "- **Takeaway** (1-3 lines): Clear learnable outcome.\n"
-                "- **CTA**: Engaging question.\n"
-                "- **Hashtags**: 6-10 relevant tags.\n"
-                "- **Keys**: post_text, hashtags, cta.\n\n"
-                
-                "2. **X/TWITTER THREAD** (Concise & Punchy):\n"
-                "- Tweet 1: Hook + Value (e.g., 'Consistency beats talent').\n"
-                "- Tweets 2-N: The Lesson/Steps (One main point per tweet). Use arrows (→) and short sentences.\n"
-                "- Final Tweet: Summary + CTA (Follow/Retweet).\n\n"
-                
-                "4. **EMAIL NEWSLETTER** (Professional Format):\n"
-                "- **Subject**: Compelling subject line (40-60 chars).\n"
-                "- **Preheader**: Supporting text (40-100 chars).\n"
-                "- **HTML Body**: Greeting + Hook + 3-5 key insights with <h2> headings + CTA.\n"
-                "- **Plain Text**: Text-only version.\n"
-                "- Use inline CSS, 600px width, professional styling.\n\n"
-                
-                "3. **YOUTUBE SCRIPT** (Engaging Video Structure):\n"
-                "- **Intro** (10-15s): Hook question + Self-intro + Purpose.\n"
-                "- **Problem/Story** (30-60s): The scenario and why it matters.\n"
-                "- **Main Content** (3-6 points): Steps/Framework. Each part needs Explanation + Example.\n"
-                "- **Key Takeaways** (10-20s).\n"
-                "- **CTA** (10-15s): Subscribe/Comment.\n"
-                "- Include [VISUAL CUE] and [SOUND EFFECT] notes in brackets."
-            )
-        
         user_prompt = f"CONTEXT:\n{context}\n\nGenerate the social media pack JSON:"
         
         try:
-            response = await aclient.chat.completions.create(
+            stream = await create_chat_completion(
                 model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"}
+                messages=agent_messages(STREAM_SOCIAL_SYSTEM, user_prompt),
+                response_format={"type": "json_object"},
+                stream=True,
+                extra_body={"prompt_cache_key": prompt_cache_key("stream-social")}
             )
             
-            content_str = clean_json_response(response.choices[0].message.content)
-            data = json.loads(content_str)
+            # Push each platform to the client as soon as its JSON value closes,
+            # and each tweet as soon as its thread entry closes
+            scanner = JSONMemberScanner(item_keys=("x_thread", "twitter_thread"))
+            data = {}
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    for event in scanner.feed(chunk.choices[0].delta.content):
+                        if event[0] == "item":
+                            await self._emit(send, {"type": "tweet_delta", "index": event[2], "content": event[3]})
+                        else:
+                            data[event[1]] = event[2]
+                            await self._emit(send, {"type": f"{event[1]}_ready", "data": event[2]})
+            
+            # Members were already decoded as they closed; only re-parse if the scanner got nothing
+            if not data:
+                data = orjson.loads(clean_json_response(scanner.text))
             
             # Update state
-            self.final_content["linkedin"] = data.get("linkedin", {"post_text": "", "hashtags": []})
+            self.final_content.linkedin = data.get("linkedin", {"post_text": "", "hashtags": []})
             
             # Handle Twitter keys
-            self.final_content["x_thread"] = data.get("x_thread", [])
-            if not self.final_content["x_thread"]:
-                self.final_content["x_thread"] = data.get("twitter_thread", [])
+            self.final_content.x_thread = data.get("x_thread", [])
+            if not self.final_content.x_thread:
+                self.final_content.x_thread = data.get("twitter_thread", [])
                 
-            self.final_content["threads"] = data.get("threads_post", [])
-            self.final_content["youtube"] = data.get("youtube", {"title": "", "script": ""})
-            self.final_content["email_newsletter"] = data.get("email_newsletter", {
+            self.final_content.threads = data.get("threads_post", [])
+            self.final_content.youtube = data.get("youtube", {"title": "", "script": ""})
+            self.final_content.email_newsletter = data.get("email_newsletter", {
                 "subject": "",
                 "preheader": "",
                 "html_body": "",
                 "plain_text": ""
             })
             
-            await self.queue.put({
+            await self._emit(send, {
                 "type": "social_complete",
                 "data": {
-                    "linkedin": self.final_content["linkedin"],
-                    "x_thread": self.final_content["x_thread"],
-                    "threads": self.final_content["threads"],
-                    "youtube": self.final_content["youtube"],
-                    "email_newsletter": self.final_content["email_newsletter"]
+                    "linkedin": self.final_content.linkedin,
+                    "x_thread": self.final_content.x_thread,
+                    "threads": self.final_content.threads,
+                    "youtube": self.final_content.youtube,
+                    "email_newsletter": self.final_content.email_newsletter
                 }
             })
             
         except Exception as e:
             logger.error(f"Social Agent Failed: {e}")
+            await self._emit(send, {"type": "error", "message": "Social generation failed"})
 
-    async def generate_parallel_stream(self, extracted_text, trend_snippets, topic) -> AsyncGenerator[str, None]:
+    async def generate_parallel_stream(self, extracted_text, trend_snippets, topic) -> AsyncGenerator[bytes, None]:
         """Main entry point for the view."""
-        trends_context = "\n".join([f"- {t['title']}: {t['snippet'][:200]}" for t in trend_snippets])
-        full_context = f"SOURCE MATERIAL:\n{extracted_text[:4000]}\n\nTRENDING INSIGHTS:\n{trends_context}"
+        # One buffer for the whole context: no per-trend strings or intermediate joins
+        buf = io.StringIO()
+        buf.write("SOURCE MATERIAL:\n")
+        buf.write(extracted_text[:4000])
+        buf.write("\n\nTRENDING INSIGHTS:")
+        for t in trend_snippets:
+            buf.write("\n- ")
+            buf.write(t['title'])
+            buf.write(": ")
+            buf.write(t['snippet'][:200])
+        full_context = buf.getvalue()
         
+        send, receive = anyio.create_memory_object_stream(STREAM_BUFFER_SIZE)
         tasks = [
-            asyncio.create_task(self._stream_blog_agent(full_context, topic)),
-            asyncio.create_task(self._stream_social_agent(full_context))
+            asyncio.create_task(self._run_agent(send.clone(), self._stream_blog_agent, full_context, topic)),
+            asyncio.create_task(self._run_agent(send.clone(), self._stream_social_agent, full_context))
         ]
+        send.close()  # Only the agents' clones keep the stream open now
         
-        active_agents = 2 
-        
-        while active_agents > 0:
-            item = await self.queue.get()
-            
-            if item["type"] in ["blog_done", "social_complete", "error"]:
-                active_agents -= 1
-                if item["type"] == "social_complete":
-                    yield f"data: {json.dumps(item)}\n\n"
-            else:
-                yield f"data: {json.dumps(item)}\n\n"
-                
-            self.queue.task_done()
+        try:
+            # Ends by itself once every agent has closed its send side
+            async with receive:
+                async for item in receive:
+                    yield b"data: " + orjson.dumps(item) + b"\n\n"
+        finally:
+            # Agents blocked on a full buffer would otherwise hang after a client disconnect
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
 
-        self.final_content["short_blog"] = self.final_content["long_blog"] 
-        
-        yield f"data: {json.dumps({'type': 'stream_done', 'final_db_data': self.final_content})}\n\n"
+        # short_blog is not sent: it only ever mirrored long_blog, so the DB writer restores it
+        yield b"data: " + orjson.dumps({'type': 'stream_done', 'final_db_data': self.final_content}) + b"\n\n"
 
 
 # --- SYNCHRONOUS FUNCTIONS (For Celery Tasks) ---
 
-def generate_content_with_openai(extracted_text: str, trend_snippets: List[Dict], platforms: List[str], brand_voice: str = "") -> Dict:
+# Static part of result['meta']; only the timestamp varies per call
+MULTI_AGENT_META = {
+    'model': 'gpt-4o (Multi-Agent)',
+    'strategy': 'Dedicated Agents',
+}
+
+BATCH_AGENT_META = {
+    'model': 'gpt-4o (Batch API)',
+    'strategy': 'Dedicated Agents',
+}
+
+UNIFIED_AGENT_META = {
+    'model': 'gpt-4o (Unified Agent)',
+    'strategy': 'Single Multi-Output Call',
+}
+
+# One gpt-4o call for all four formats instead of the agent grid: pays the master
+# prompt + context input once. Off by default so the two can be compared.
+OPENAI_UNIFIED_AGENT = os.getenv('OPENAI_UNIFIED_AGENT', 'False') == 'True'
+# Sum of the four agents' output budgets, so the shared reply isn't cut off mid-JSON
+UNIFIED_MAX_TOKENS = 11200
+
+AGENT_LABELS = {
+    'blog': 'Blog',
+    'youtube': 'YouTube',
+    'social': 'Social',
+    'email': 'Email',
+}
+
+# Returned in place of an agent's output when its call or JSON parse fails
+AGENT_FALLBACKS = {
+    'blog': {'title': 'Generation Error', 'html_content': '<p>Could not generate blog content.</p>'},
+    'youtube': {'title': '', 'script': 'Error generating script.', 'description': ''},
+    'social': {
+        'linkedin': {'post_text': '', 'hashtags': []},
+        'twitter_thread': []
+    },
+    'email': {
+        'subject': 'Newsletter Update',
+        'preheader': 'Your latest insights inside',
+        'html_body': '<p>Error generating email content.</p>',
+        'plain_text': 'Error generating email content.'
+    },
+}
+
+
+def build_agent_context(extracted_text: str, trend_snippets: List[Dict]) -> str:
+    """Source material + market trends, as every Celery agent sees them."""
+    # Single buffer, no per-trend strings; `or` also covers None values
+    buf = io.StringIO()
+    buf.write("CORE CONTENT:\n")
+    buf.write(truncate_to_tokens(extracted_text, AGENT_SOURCE_TOKENS))
+    buf.write("\n\nMARKET TRENDS:")
+    for t in trend_snippets[:10]:
+        buf.write("\n- [")
+        buf.write(t.get('source') or 'Trend')
+        buf.write("] ")
+        buf.write(t.get('title') or 'Untitled')
+        buf.write(": ")
+        buf.write((t.get('snippet') or '')[:300])
+    return buf.getvalue()
+
+
+def build_agent_requests(extracted_text: str, trend_snippets: List[Dict], brand_voice: str = "") -> Dict[str, Dict]:
     """
-    Generate content using a Multi-Agent Architecture (Synchronous wrapper for Celery).
-    Injects Brand Voice settings if provided.
+    Build the chat.completions request body for each of the four agents.
+    Shared by the realtime Celery path and the Batch API path.
     """
+    full_input_text = build_agent_context(extracted_text, trend_snippets)
     
-    # 1. Prepare Context
-    trends_context = "\n".join([
-        f"- [{t.get('source', 'Trend')}] {t.get('title', 'Untitled')}: {t.get('snippet', '')[:300]}" 
-        for t in trend_snippets[:10]
-    ])
-    
-    full_input_text = f"CORE CONTENT:\n{extracted_text[:3000]}\n\nMARKET TRENDS:\n{trends_context}"
-    
-    # --- PREPARE BRAND VOICE INSTRUCTION ---
-    brand_instruction = ""
-    if brand_voice:
-        brand_instruction = (
-            "\n\n### CRITICAL: BRAND VOICE INSTRUCTIONS ###\n"
-            f"You MUST adhere to the following tone, style, and directives:\n{brand_voice}\n"
-            "Ignore any default generic AI tone. Sound like THIS brand.\n"
-        )
+    return {
+        'blog': {
+            'model': "gpt-4o",
+            'messages': agent_messages(
+                AGENT_SYSTEM_MESSAGES['blog'],
+                f"Write the blog post based on:\n\n{full_input_text}\n\nReturn JSON only.",
+                brand_voice
+            ),
+            'prompt_cache_key': prompt_cache_key('blog'),
+            'response_format': {"type": "json_object"},
+            'temperature': 0.7,
+            'max_tokens': 4000
+        },
+        'youtube': {
+            'model': "gpt-4o",
+            'messages': agent_messages(
+                AGENT_SYSTEM_MESSAGES['youtube'],
+                f"Write the viral script based on:\n\n{full_input_text}\n\nReturn JSON only.",
+                brand_voice
+            ),
+            'prompt_cache_key': prompt_cache_key('youtube'),
+            'response_format': {"type": "json_object"},
+            'temperature': 0.8,
+            'max_tokens': 3200
+        },
+        'social': {
+            'model': "gpt-4o",
+            'messages': agent_messages(
+                AGENT_SYSTEM_MESSAGES['social'],
+                f"Generate the social posts based on:\n\n{full_input_text}\n\nReturn JSON only.",
+                brand_voice
+            ),
+            'prompt_cache_key': prompt_cache_key('social'),
+            'response_format': {"type": "json_object"},
+            'temperature': 0.85,
+            'max_tokens': 1800
+        },
+        'email': {
+            'model': "gpt-4o",
+            'messages': agent_messages(
+                AGENT_SYSTEM_MESSAGES['email'],
+                f"Create an email newsletter based on:\n\n{full_input_text}\n\nReturn JSON only.",
+                brand_voice
+            ),
+            'prompt_cache_key': prompt_cache_key('email'),
+            'response_format': {"type": "json_object"},
+            'temperature': 0.75,
+            'max_tokens': 2200
+        },
+    }
 
-    # --- AGENT 1: The Editorial Director (Blog) ---
-    def run_blog_agent():
-        try:
-            if MASTER_PROMPT:
-                system_prompt = (
-                    f"{MASTER_PROMPT}\n\n"
-                    "=============================================================================\n"
-                    "TASK: Generate a BLOG/ARTICLE following the TrendMaster V6 specifications.\n"
-                    "=============================================================================\n\n"
-                    "Apply the 'BLOG/ARTICLE (Authority Architecture)' blueprint:\n"
-                    "- Use Headline Engineering formula\n"
-                    "- Follow Opening Section structure\n"
-                    "- Apply all 10 Commandments\n"
-                    "- Include Named Frameworks and Proof Stacking\n"
-                    "- SEO optimization required\n"
-                    f"{brand_instruction}"
-                    "\n\nReturn JSON with keys: 'title', 'html_content'."
-                )
-            else:
-                system_prompt = (
-                    "You are an elite SEO Content Writer. Write a definitive, deep-dive article (1,800+ words) "
-                    "following this STRICT template:\n\n"
-                    "Title: Compelling, specific, includes the promise.\n"
-                    "Introduction: Hook + Problem + Promise (What the reader will learn).\n"
-                    "Section 1 - Context/Background: Explain the problem space. Provide stats/insights.\n"
-                    "Section 2 - Main Concepts/Framework: Use <h3> headings for steps. "
-                    "For EACH step, include: What it is + Why it matters + Example + Action Items.\n"
-                    "Section 3 - Tools & Resources: Tech stack, templates, or playbooks.\n"
-                    "Conclusion: Final takeaway + Short summary of key points.\n"
-                    "CTA: Encouraging next step.\n\n"
-                    "Format: HTML (<h3>, <p>, <ul>, <li>, <strong>). Do NOT use <html> or <body> tags. "
-                    "Tone: Professional, authoritative, yet accessible."
-                    f"{brand_instruction}"
-                    "\n\nReturn JSON with keys: 'title', 'html_content'."
-                )
-            
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Write the blog post based on:\n\n{full_input_text}\n\nReturn JSON only."}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.7,
-                max_tokens=4000
-            )
-            content = clean_json_response(response.choices[0].message.content)
-            return json.loads(content)
-        except Exception as e:
-            logger.error(f"Blog Agent failed: {e}")
-            return {'title': 'Generation Error', 'html_content': '<p>Could not generate blog content.</p>'}
 
-    # --- AGENT 2: The YouTube Producer (Script) ---
-    def run_youtube_agent():
-        try:
-            if MASTER_PROMPT:
-                system_prompt = (
-                    f"{MASTER_PROMPT}\n\n"
-                    "=============================================================================\n"
-                    "TASK: Generate YOUTUBE SCRIPT following TrendMaster V6 specifications.\n"
-                    "=============================================================================\n\n"
-                    "Apply the 'YOUTUBE SCRIPT (Cinematic Performance Blueprint)' section:\n"
-                    "- Use Cold Open pattern (0:00-0:03)\n"
-                    "- Follow Chapter-Based Structure\n"
-                    "- Include Retention Mechanisms every 45-60 seconds\n"
-                    "- Add [VISUAL], [AUDIO], and [RETENTION HOOK] cues\n"
-                    "- Apply all 10 Commandments\n"
-                    f"{brand_instruction}"
-                    "\n\nReturn JSON with keys: 'title', 'script', 'description'."
-                )
-            else:
-                system_prompt = (
-                    "You are a YouTube Scriptwriter for channels like MrBeast or Ali Abdaal. "
-                    "Write a FULL 10-minute video script (approx 1,500 words) using this Engaging Structure:\n\n"
-                    "1. **INTRO (10-15 sec)**: Hook question / bold statement + Introduce self & purpose.\n"
-                    "2. **STORY/PROBLEM (30-60 sec)**: Explain the scenario & why it matters.\n"
-                    "3. **MAIN CONTENT (3-6 Points)**: Detailed steps/framework. Each part includes Explanation + Example.\n"
-                    "4. **KEY TAKEAWAYS (10-20 sec)**: Rapid summary.\n"
-                    "5. **CTA (10-15 sec)**: Subscribe/Like/Comment.\n"
-                    "6. **OUTRO**: Offer value or teaser.\n\n"
-                    "CRITICAL: You MUST include production notes in brackets like [VISUAL: Stock charts], [SOUND: Cash register], [TEXT OVERLAY]. "
-                    f"{brand_instruction}"
-                    "\n\nReturn JSON with keys: 'title', 'script', 'description'."
-                )
-            
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Write the viral script based on:\n\n{full_input_text}\n\nReturn JSON only."}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.8,
-                max_tokens=4000
-            )
-            content = clean_json_response(response.choices[0].message.content)
-            return json.loads(content)
-        except Exception as e:
-            logger.error(f"YouTube Agent failed: {e}")
-            return {'title': '', 'script': 'Error generating script.', 'description': ''}
+def build_unified_request(extracted_text: str, trend_snippets: List[Dict], brand_voice: str = "") -> Dict:
+    """Request body for the single-call alternative to the four agents."""
+    full_input_text = build_agent_context(extracted_text, trend_snippets)
+    return {
+        'model': "gpt-4o",
+        'messages': agent_messages(
+            UNIFIED_SYSTEM,
+            f"Create all four deliverables based on:\n\n{full_input_text}\n\nReturn JSON only.",
+            brand_voice
+        ),
+        'prompt_cache_key': prompt_cache_key('unified'),
+        'response_format': {"type": "json_object"},
+        'temperature': 0.75,
+        'max_tokens': UNIFIED_MAX_TOKENS
+    }
 
-    # --- AGENT 3: The Social Media Ghostwriter (LinkedIn/Twitter) ---
-    def run_social_agent():
-        try:
-            if MASTER_PROMPT:
-                system_prompt = (
-                    f"{MASTER_PROMPT}\n\n"
-                    "=============================================================================\n"
-                    "TASK: Generate LINKEDIN and TWITTER content following TrendMaster V6 specifications.\n"
-                    "=============================================================================\n\n"
-                    "PLATFORMS:\n"
-                    "1. LINKEDIN - Apply 'LINKEDIN (Authority + Demand Gen Engine)' blueprint\n"
-                    "2. TWITTER - Apply 'TWITTER/X THREAD (Viral Density Engine)' blueprint\n\n"
-                    "REQUIREMENTS:\n"
-                    "- Use ALL 10 Commandments\n"
-                    "- Apply Hook Formulas specified for each platform\n"
-                    "- Include psychographic triggers\n"
-                    "- Zero banned words\n"
-                    "- Specific CTAs (never generic)\n"
-                    f"{brand_instruction}"
-                    "\n\nReturn JSON: {'linkedin': {'post_text': '...', 'hashtags': [...], 'cta': '...'}, 'twitter_thread': [...]}"
-                )
-            else:
-                system_prompt = (
-                    "You are a specialized Social Media Ghostwriter. Generate high-engagement text. "
-                    "Return strictly valid JSON with keys: 'linkedin', 'twitter_thread'.\n\n"
-                    
-                    "1. **LINKEDIN POST** (Professional & Storytelling):\n"
-                    "   - Hook (1-2 lines): Bold insight or surprising fact.\n"
-                    "   - Context (2-4 lines): Describe situation/problem.\n"
-                    "   - Insight/Solution (3-6 lines): What changed/learned.\n"
-                    "   - Takeaway (1-3 lines): Clear learnable outcome.\n"
-                    "   - CTA: Question for engagement.\n"
-                    "   - Hashtags: 6-10 relevant tags.\n"
-                    "   - Keys needed: 'post_text', 'hashtags', 'cta'.\n\n"
-                    
-                    "2. **TWITTER THREAD** (Concise & Punchy):\n"
-                    "   - 10-15 Tweets total.\n"
-                    "   - Tweet 1: Hook + Value (e.g. 'Consistency beats talent').\n"
-                    "   - Body: Step-by-step breakdown. One main point per tweet.\n"
-                    "   - Format: Use emojis and arrows (->) for readability.\n"
-                    "   - Final Tweet: Summary + CTA.\n"
-                    "   - Return as array of strings."
-                    f"{brand_instruction}"
-                )
-            
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Generate the social posts based on:\n\n{full_input_text}\n\nReturn JSON only."}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.85,
-                max_tokens=3000
-            )
-            
-            content_str = clean_json_response(response.choices[0].message.content)
-            return json.loads(content_str)
-            
-        except Exception as e:
-            logger.error(f"Social Agent failed: {e}")
-            return {
-                'linkedin': {'post_text': '', 'hashtags': []}, 
-                'twitter_thread': []
-            }
-
-    # --- AGENT 4: The Email Marketing Specialist (Newsletter) ---
-    def run_email_agent():
-        try:
-            if MASTER_PROMPT:
-                system_prompt = (
-                    f"{MASTER_PROMPT}\n\n"
-                    "=============================================================================\n"
-                    "TASK: Generate EMAIL NEWSLETTER following TrendMaster V6 specifications.\n"
-                    "=============================================================================\n\n"
-                    "Apply the 'EMAIL NEWSLETTER (Inbox-to-Action Pipeline)' blueprint:\n"
-                    "- Subject Line formulas (40-50 chars)\n"
-                    "- Preheader technique\n"
-                    "- Email Body Structure with Hook + Value Core + CTA\n"
-                    "- Design Specifications (600px, inline CSS)\n"
-                    "- Apply all 10 Commandments\n"
-                    f"{brand_instruction}"
-                    "\n\nReturn JSON with keys: 'subject', 'preheader', 'html_body', 'plain_text'."
-                )
-            else:
-                system_prompt = (
-                    "You are an expert Email Marketing Copywriter. Create a professional, engaging email newsletter "
-                    "using proven email marketing best practices.\n\n"
-                    "Structure:\n"
-                    "1. **SUBJECT LINE**: Compelling, curiosity-driven, 40-60 characters. Promise value.\n"
-                    "2. **PREHEADER**: Supporting text that complements subject (40-100 chars).\n"
-                    "3. **EMAIL BODY** (HTML Format):\n"
-                    "   - Personalized greeting: 'Hi there,' or 'Hey [Name],'\n"
-                    "   - Hook paragraph: Start with a relatable problem or question\n"
-                    "   - Main content: 3-5 key insights or tips. Use <h2> for sections.\n"
-                    "   - Each section should have: Clear headline + 2-3 paragraphs + bullet points if applicable\n"
-                    "   - Visual breaks: Use horizontal rules <hr> between sections\n"
-                    "   - CTA Button: Include a clear call-to-action in a styled button\n"
-                    "   - Footer: Include unsubscribe link and company info placeholder\n"
-                    "4. **PLAIN TEXT VERSION**: Text-only version of the email for email clients that don't support HTML\n\n"
-                    "Styling Guidelines:\n"
-                    "- Use inline CSS styles for email compatibility\n"
-                    "- Keep width to 600px max\n"
-                    "- Use safe fonts: Arial, Helvetica, sans-serif\n"
-                    "- Include responsive meta tags\n"
-                    "- Professional color scheme (primary: #4F46E5, text: #1F2937)\n"
-                    f"{brand_instruction}"
-                    "\n\nReturn JSON with keys: 'subject', 'preheader', 'html_body', 'plain_text'."
-                )
-            
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Create an email newsletter based on:\n\n{full_input_text}\n\nReturn JSON only."}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.75,
-                max_tokens=3500
-            )
-            content = clean_json_response(response.choices[0].message.content)
-            return json.loads(content)
-        except Exception as e:
-            logger.error(f"Email Agent failed: {e}")
-            return {
-                'subject': 'Newsletter Update',
-                'preheader': 'Your latest insights inside',
-                'html_body': '<p>Error generating email content.</p>',
-                'plain_text': 'Error generating email content.'
-            }
-
-    # --- EXECUTE PARALLEL AGENTS ---
-    logger.info("Launching Multi-Agent Generation Grid...")
-    
-    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-        # Submit all tasks
-        future_blog = executor.submit(run_blog_agent)
-        future_youtube = executor.submit(run_youtube_agent)
-        future_social = executor.submit(run_social_agent)
-        future_email = executor.submit(run_email_agent)
-        
-        # Gather results
-        blog_data = future_blog.result()
-        youtube_data = future_youtube.result()
-        social_data = future_social.result()
-        email_data = future_email.result()
-    
-    # --- MERGE RESULTS ---
+
+async def run_unified_agent(extracted_text: str, trend_snippets: List[Dict], brand_voice: str = "") -> Dict[str, Dict]:
+    """Run the single-call agent and split its reply into the per-agent results shape."""
+    try:
+        response = await create_chat_completion(**as_sdk_kwargs(
+            build_unified_request(extracted_text, trend_snippets, brand_voice)
+        ))
+        data = orjson.loads(clean_json_response(response.choices[0].message.content))
+    except TRANSIENT_OPENAI_ERRORS:
+        raise
+    except Exception as e:
+        logger.error(f"Unified Agent failed: {e}")
+        data = {}
+    return {
+        agent: data.get(agent) or copy.deepcopy(fallback)
+        for agent, fallback in AGENT_FALLBACKS.items()
+    }
+
+
+def parse_agent_content(agent: str, content: str) -> Dict:
+    """Decode an agent's JSON reply, falling back to its placeholder output."""
+    try:
+        return orjson.loads(clean_json_response(content))
+    except Exception as e:
+        logger.error(f"{AGENT_LABELS[agent]} Agent returned invalid JSON: {e}")
+        return copy.deepcopy(AGENT_FALLBACKS[agent])
+
+
+def merge_agent_results(results: Dict[str, Dict], started_at: str, meta: Dict = MULTI_AGENT_META) -> Dict:
+    """Combine the four agent outputs into the content_json shape stored on GeneratedContent."""
+    blog_data = results.get('blog') or copy.deepcopy(AGENT_FALLBACKS['blog'])
+    youtube_data = results.get('youtube') or copy.deepcopy(AGENT_FALLBACKS['youtube'])
+    social_data = results.get('social') or copy.deepcopy(AGENT_FALLBACKS['social'])
+    email_data = results.get('email') or copy.deepcopy(AGENT_FALLBACKS['email'])
     
     # 1. Safely extract Twitter Thread
     twitter_thread = social_data.get('twitter_thread', [])
@@ -581,62 +1001,277 @@ def generate_content_with_openai(extracted_text: str, trend_snippets: List[Dict]
         # Try fallbacks
         linkedin_data['post_text'] = linkedin_data.get('text') or linkedin_data.get('content') or ''
 
-    result = {
+    return {
         'long_blog': blog_data,
         'youtube': youtube_data,
         'linkedin': linkedin_data,
         'twitter_thread': twitter_thread,
         'email_newsletter': email_data,
-        'meta': {
-            'generated_at': datetime.now(timezone.utc).isoformat(),
-            'model': 'gpt-4o (Multi-Agent)',
-            'strategy': 'Dedicated Agents',
-        }
+        'meta': {'generated_at': started_at, **meta},
     }
+
+
+# Identical source material + trends + brand voice reuse the stored generation for a week
+GENERATION_CACHE_TTL = 7 * 86400
+
+def generation_cache_key(extracted_text: str, trend_snippets: List[Dict], brand_voice: str = "") -> str:
+    """
+    Cache key over exactly the inputs the agents see, versioned by the prompt cache prefix
+    so a master prompt bump invalidates old generations. Grid and unified outputs are
+    kept apart so comparing the two isn't skewed by cache hits.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    source_text = truncate_to_tokens(extracted_text, AGENT_SOURCE_TOKENS)
+    mode = "unified" if OPENAI_UNIFIED_AGENT else "grid"
+    for part in (PROMPT_CACHE_KEY_PREFIX, mode, source_text, brand_voice or ""):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    digest.update(orjson.dumps([
+        (t.get('source'), t.get('title'), (t.get('snippet') or '')[:300])
+        for t in trend_snippets[:10]
+    ]))
+    return f"openai-content:{digest.hexdigest()}"
+
+
+async def agenerate_content_with_openai(extracted_text: str, trend_snippets: List[Dict], platforms: List[str], brand_voice: str = "") -> Dict:
+    """
+    Generate content using a Multi-Agent Architecture, or one unified call when
+    OPENAI_UNIFIED_AGENT is set. All agent calls overlap on the running event loop.
+    Injects Brand Voice settings if provided. TRANSIENT_OPENAI_ERRORS propagate so the
+    caller can retry; other agent failures fall back to placeholder output.
+    """
+    cache_key = generation_cache_key(extracted_text, trend_snippets, brand_voice)
+    try:
+        cached = await cache.aget(cache_key)
+    except Exception as e:
+        logger.warning(f"Generation cache lookup failed: {e}")
+        cached = None
+    if cached is not None:
+        logger.info("Multi-Agent generation served from cache")
+        return cached
+    
+    started_at = datetime.now(timezone.utc).isoformat()
+    
+    if OPENAI_UNIFIED_AGENT:
+        logger.info("Launching Unified Agent...")
+        results = await run_unified_agent(extracted_text, trend_snippets, brand_voice)
+        meta = UNIFIED_AGENT_META
+    else:
+        agent_requests = build_agent_requests(extracted_text, trend_snippets, brand_voice)
+
+        async def run_agent(agent: str) -> Dict:
+            try:
+                response = await create_chat_completion(**as_sdk_kwargs(agent_requests[agent]))
+                return parse_agent_content(agent, response.choices[0].message.content)
+            except TRANSIENT_OPENAI_ERRORS:
+                raise
+            except Exception as e:
+                logger.error(f"{AGENT_LABELS[agent]} Agent failed: {e}")
+                return copy.deepcopy(AGENT_FALLBACKS[agent])
+
+        # --- EXECUTE PARALLEL AGENTS ---
+        logger.info("Launching Multi-Agent Generation Grid...")
+        results = dict(zip(agent_requests, await asyncio.gather(*(run_agent(agent) for agent in agent_requests))))
+        meta = MULTI_AGENT_META
+    
+    # --- MERGE RESULTS ---
+    result = merge_agent_results(results, started_at, meta=meta)
+    
+    # Only cache complete generations, never placeholder fallbacks (API or JSON failures)
+    if not any(results[agent] == AGENT_FALLBACKS[agent] for agent in results):
+        try:
+            await cache.aset(cache_key, result, timeout=GENERATION_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Generation cache store failed: {e}")
     
     logger.info("Multi-Agent generation completed successfully")
     return result
 
 
-# --- Synchronous Helper Functions (GPT-4o) ---
+def generate_content_with_openai(extracted_text: str, trend_snippets: List[Dict], platforms: List[str], brand_voice: str = "") -> Dict:
+    """
+    Synchronous wrapper for Celery: runs agenerate_content_with_openai on the shared
+    agents loop so its pooled AsyncOpenAI connections stay warm across tasks.
+    """
+    return run_coroutine_sync(agenerate_content_with_openai(extracted_text, trend_snippets, platforms, brand_voice))
+
+
+# --- BATCH API (non-interactive, 50% cost, results within 24h) ---
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_PENDING_STATUSES = {'validating', 'in_progress', 'finalizing'}
+
+
+def generate_content_batch(jobs: List[Dict]) -> str:
+    """
+    Submit the four agent requests for every job as one OpenAI Batch.
+
+    Each job is a dict with 'job_id', 'extracted_text', 'trend_snippets' and
+    optional 'brand_voice'. Returns the batch ID to poll with collect_content_batch.
+    """
+    lines = []
+    for job in jobs:
+        agent_requests = build_agent_requests(
+            job['extracted_text'], job.get('trend_snippets', []), job.get('brand_voice', "")
+        )
+        for agent, body in agent_requests.items():
+            lines.append(orjson.dumps({
+                "custom_id": f"{job['job_id']}:{agent}",
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": body,
+            }))
+    
+    batch_file = run_client_sync(lambda c: c.files.create(
+        file=("content_batch.jsonl", b"\n".join(lines)),
+        purpose="batch"
+    ))
+    batch = run_client_sync(lambda c: c.batches.create(
+        input_file_id=batch_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h"
+    ))
+    logger.info(f"Submitted content batch {batch.id} ({len(jobs)} jobs, {len(lines)} requests)")
+    return batch.id
+
+
+def collect_content_batch(batch_id: str) -> Optional[Dict[str, Dict]]:
+    """
+    Fetch results for a submitted batch.
+
+    Returns None while the batch is still running, otherwise a mapping of
+    job_id -> merged content_json. Agents that errored get their fallback output.
+    """
+    batch = run_client_sync(lambda c: c.batches.retrieve(batch_id))
+    if batch.status in BATCH_PENDING_STATUSES:
+        return None
+    if batch.status != 'completed':
+        raise RuntimeError(f"Content batch {batch_id} ended with status '{batch.status}'")
+    
+    results: Dict[str, Dict[str, Dict]] = {}
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        output = run_client_sync(lambda c: c.files.content(file_id))
+        for line in output.content.splitlines():
+            if not line.strip():
+                continue
+            item = orjson.loads(line)
+            job_id, agent = item['custom_id'].rsplit(':', 1)
+            job_results = results.setdefault(job_id, {})
+            response = item.get('response') or {}
+            if response.get('status_code') == 200:
+                content = response['body']['choices'][0]['message']['content']
+                job_results[agent] = parse_agent_content(agent, content)
+            else:
+                logger.error(f"Batch {batch_id}: {AGENT_LABELS[agent]} Agent failed for job {job_id}: {item.get('error')}")
+    
+    completed_at = datetime.now(timezone.utc).isoformat()
+    return {
+        job_id: merge_agent_results(job_results, completed_at, meta=BATCH_AGENT_META)
+        for job_id, job_results in results.items()
+    }
+
+
+# --- Synchronous Helper Functions (GPT-4o-mini: narrow tasks, cheaper & faster) ---
+
+# Re-uploads, retries and re-indexing resend identical text; deterministic helper
+# results are cached by content hash so those skip the API round-trip
+HELPER_CACHE_TTL = 24 * 3600
+EMBEDDING_MODEL = "text-embedding-3-large"
+EMBEDDING_DIMENSIONS = 3072
+# Texts per embeddings request; larger inputs are split and the chunks sent concurrently
+EMBEDDING_BATCH_SIZE = 96
+
+def helper_cache_key(kind: str, text: str) -> str:
+    normalized = " ".join(text.split())
+    return f"openai-{kind}:{hashlib.sha256(normalized.encode()).hexdigest()}"
+
+def _cache_get_many(keys: List[str]) -> Dict[str, Any]:
+    try:
+        return cache.get_many(keys)
+    except Exception as e:
+        logger.warning(f"Helper cache lookup failed: {e}")
+        return {}
+
+def _cache_set_many(values: Dict[str, Any]):
+    try:
+        cache.set_many(values, timeout=HELPER_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Helper cache store failed: {e}")
 
 def extract_topic_from_text_openai(text):
+    topic_input = text[:1000]
+    cache_key = helper_cache_key("topic", topic_input)
+    cached = _cache_get_many([cache_key])
+    if cache_key in cached:
+        return cached[cache_key]
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
+        response = create_chat_completion_sync(
+            model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "Extract the main topic in 2-4 words. Be specific."},
-                {"role": "user", "content": text[:1000]}
+                {"role": "user", "content": topic_input}
             ],
-            max_tokens=50
+            max_tokens=50,
+            temperature=0  # Deterministic so identical inputs are cacheable
         )
-        return response.choices[0].message.content.strip()
+        topic = response.choices[0].message.content.strip()
     except:
         return "General Industry Trends"
+    _cache_set_many({cache_key: topic})
+    return topic
 
 def generate_hooks_openai(topic, count=5):
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
+        response = create_chat_completion_sync(
+            model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": f"Generate {count} viral hooks. Styles: Contrarian, Story, Data-driven. Return JSON array."},
                 {"role": "user", "content": topic}
             ],
-            response_format={"type": "json_object"}
+            response_format={"type": "json_object"},
+            max_tokens=400
         )
-        data = json.loads(clean_json_response(response.choices[0].message.content))
+        # JSON mode guarantees a bare object: no fence stripping needed
+        data = orjson.loads(response.choices[0].message.content)
         return data.get("hooks", [])
     except:
         return []
 
-def get_embeddings_openai(texts):
-    try:
-        response = client.embeddings.create(
-            model="text-embedding-3-large", 
-            input=texts if isinstance(texts, list) else [texts],
-            dimensions=3072
-        )
+async def aembed_texts(texts: List[str]) -> List[List[float]]:
+    """Embed texts in EMBEDDING_BATCH_SIZE chunks, all in flight at once, keeping input order."""
+    aclient = get_aclient()
+    semaphore = _get_semaphore()
+
+    async def embed_chunk(chunk: List[str]) -> List[List[float]]:
+        async with semaphore:
+            response = await aclient.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=chunk,
+                dimensions=EMBEDDING_DIMENSIONS
+            )
         return [item.embedding for item in response.data]
-    except Exception as e:
-        logger.error(f"Embedding Error: {e}")
-        return []
\ No newline at end of file
+
+    chunks = await asyncio.gather(*(
+        embed_chunk(texts[i:i + EMBEDDING_BATCH_SIZE])
+        for i in range(0, len(texts), EMBEDDING_BATCH_SIZE)
+    ))
+    return [vector for chunk in chunks for vector in chunk]
+
+def get_embeddings_openai(texts):
+    texts = texts if isinstance(texts, list) else [texts]
+    keys = [helper_cache_key(f"embedding-{EMBEDDING_DIMENSIONS}", text) for text in texts]
+    cached = _cache_get_many(keys)
+    # Only the texts without a cached vector go to the API
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    if missing:
+        try:
+            vectors = run_coroutine_sync(aembed_texts([texts[i] for i in missing]))
+        except Exception as e:
+            logger.error(f"Embedding Error: {e}")
+            return []
+        fresh = {keys[i]: vector for i, vector in zip(missing, vectors)}
+        _cache_set_many(fresh)
+        cached.update(fresh)
+    return [cached[key] for key in keys]
\ No newline at end of file
@@ -7,11 +7,66 @@ from typing import Dict, List
 from apps.ingest.models import UploadedFile, GeneratedContent
 from apps.trends.vectorstore import get_trend_snippets
 from django.contrib.auth import get_user_model
+from apps.users.models import UserProfile
 from . import ai_wrapper
+# Transient OpenAI/network failures the wrapper lets propagate: Celery retries them with backoff
+from .openai_wrapper import TRANSIENT_OPENAI_ERRORS
 
 logger = logging.getLogger(__name__)
 
-@shared_task(bind=True, name='generator.generate_content_async', time_limit=600, soft_time_limit=540)
+# Batch API polling: start at 5s and double up to 60s, for slightly longer than the 24h window
+BATCH_POLL_INITIAL = 5
+BATCH_POLL_MAX = 60
+BATCH_MAX_POLLS = 1500
+# Rows per INSERT when storing batch results
+BULK_CREATE_BATCH_SIZE = 500
+
+# Columns the generation tasks read from UploadedFile (skips file/url/filename metadata)
+GENERATION_FILE_FIELDS = ('id', 'detected_topic', 'extracted_text', 'topic_embedding')
+
+
+def _batch_poll_countdown(retries: int) -> int:
+    """Exponential poll delay (5s, 10s, 20s, 40s, 60s, 60s...) for the given retry count."""
+    return min(BATCH_POLL_INITIAL * 2 ** min(retries, 4), BATCH_POLL_MAX)
+
+
+def _load_user_and_brand_voice(user_id):
+    """Return (user, brand_voice) for the requesting user, tolerating missing users."""
+    User = get_user_model()
+    user = None
+    brand_voice = ""
+    
+    if user_id:
+        try:
+            # Profile joined in the same query
+            user = User.objects.select_related('profile').get(id=user_id)
+            brand_voice = user.profile.brand_voice
+            if brand_voice:
+                logger.info(f"Applying Brand Voice for user {user.username}")
+        except User.DoesNotExist:
+            logger.warning(f"User ID {user_id} not found")
+        except UserProfile.DoesNotExist:
+            pass
+    
+    return user, brand_voice
+
+
+def _topic_query_vec(uploaded_file):
+    """Stored topic embedding for trend search, when it matches the topic being searched."""
+    return uploaded_file.topic_embedding if uploaded_file.detected_topic else None
+
+
+@shared_task(
+    bind=True,
+    name='generator.generate_content_async',
+    autoretry_for=TRANSIENT_OPENAI_ERRORS,
+    retry_backoff=2,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    max_retries=6,
+    time_limit=600,
+    soft_time_limit=540,
+)
 def generate_content_async(self, uploaded_file_id: int, platforms: List[str], trend_count: int = 5, user_id: int = None):
     """
     1. Extracts topic
@@ -23,26 +78,14 @@ def generate_content_async(self, uploaded_file_id: int, platforms: List[str], tr
     try:
         self.update_state(state='PROCESSING', meta={'status': 'Loading file...'})
         
-        uploaded_file = UploadedFile.objects.get(id=uploaded_file_id)
+        uploaded_file = UploadedFile.objects.only(*GENERATION_FILE_FIELDS).get(id=uploaded_file_id)
         topic = uploaded_file.detected_topic or "marketing trends"
         
         # --- NEW: Fetch User & Brand Voice ---
-        User = get_user_model()
-        user = None
-        brand_voice = ""
-        
-        if user_id:
-            try:
-                user = User.objects.get(id=user_id)
-                # Check if profile exists and has brand voice
-                if hasattr(user, 'profile') and user.profile.brand_voice:
-                    brand_voice = user.profile.brand_voice
-                    logger.info(f"Applying Brand Voice for user {user.username}")
-            except User.DoesNotExist:
-                logger.warning(f"User ID {user_id} not found")
+        user, brand_voice = _load_user_and_brand_voice(user_id)
 
         self.update_state(state='PROCESSING', meta={'status': 'Fetching trends...'})
-        trend_snippets = get_trend_snippets(topic, k=trend_count)
+        trend_snippets = get_trend_snippets(topic, k=trend_count, query_vec=_topic_query_vec(uploaded_file))
         
         self.update_state(state='PROCESSING', meta={'status': 'Generating content with AI Agents...'})
         
@@ -76,6 +119,101 @@ def generate_content_async(self, uploaded_file_id: int, platforms: List[str], tr
         
     except UploadedFile.DoesNotExist:
         return {'status': 'failed', 'error': 'Uploaded file not found'}
+    except TRANSIENT_OPENAI_ERRORS as e:
+        logger.warning(f"Task hit a transient error, retrying: {e}")
+        raise
     except Exception as e:
         logger.error(f"Task failed: {e}", exc_info=True)
-        return {'status': 'failed', 'error': str(e)}
\ No newline at end of file
+        return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task(bind=True, name='generator.generate_content_batch')
+def generate_content_batch_async(self, uploaded_file_ids: List[int], platforms: List[str], trend_count: int = 5, user_id: int = None):
+    """
+    Bulk, non-interactive generation through the OpenAI Batch API (half the cost,
+    no realtime rate-limit pressure). Submits every file's agents as one batch
+    and schedules poll_content_batch to store the results.
+    """
+    if ai_wrapper.AI_PROVIDER != 'openai':
+        # Batch API is OpenAI-only; fall back to one realtime task per file
+        for uploaded_file_id in uploaded_file_ids:
+            generate_content_async.delay(uploaded_file_id, platforms, trend_count, user_id)
+        return {'status': 'dispatched', 'jobs': len(uploaded_file_ids)}
+    
+    from .openai_wrapper import generate_content_batch
+    
+    try:
+        _, brand_voice = _load_user_and_brand_voice(user_id)
+        
+        jobs = []
+        trends_used = {}
+        for uploaded_file in UploadedFile.objects.filter(id__in=uploaded_file_ids).only(*GENERATION_FILE_FIELDS):
+            topic = uploaded_file.detected_topic or "marketing trends"
+            trend_snippets = get_trend_snippets(topic, k=trend_count, query_vec=_topic_query_vec(uploaded_file))
+            job_id = str(uploaded_file.id)
+            jobs.append({
+                'job_id': job_id,
+                'extracted_text': uploaded_file.extracted_text,
+                'trend_snippets': trend_snippets,
+                'brand_voice': brand_voice,
+            })
+            trends_used[job_id] = [{
+                'title': snippet['title'],
+                'source': snippet['source']
+            } for snippet in trend_snippets[:5]]
+        
+        if not jobs:
+            return {'status': 'failed', 'error': 'Uploaded files not found'}
+        
+        batch_id = generate_content_batch(jobs)
+        poll_content_batch.apply_async(args=[batch_id, trends_used, user_id], countdown=BATCH_POLL_INITIAL)
+        
+        return {'status': 'submitted', 'batch_id': batch_id, 'jobs': len(jobs)}
+        
+    except Exception as e:
+        logger.error(f"Batch submission failed: {e}", exc_info=True)
+        return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task(bind=True, name='generator.poll_content_batch', max_retries=BATCH_MAX_POLLS)
+def poll_content_batch(self, batch_id: str, trends_used: Dict[str, List[Dict]], user_id: int = None):
+    """
+    Poll a submitted content batch; once complete, save one GeneratedContent per file.
+    """
+    from .openai_wrapper import collect_content_batch
+    
+    try:
+        results = collect_content_batch(batch_id)
+    except TRANSIENT_OPENAI_ERRORS as e:
+        # The batch is already paid for: keep polling through blips instead of dropping it
+        logger.warning(f"Content batch {batch_id} poll hit a transient error, retrying: {e}")
+        raise self.retry(countdown=_batch_poll_countdown(self.request.retries))
+    if results is None:
+        raise self.retry(countdown=_batch_poll_countdown(self.request.retries))
+    
+    user, _ = _load_user_and_brand_voice(user_id)
+    
+    # Uploads deleted during the batch window would fail the whole INSERT on their FK
+    existing_ids = set(
+        UploadedFile.objects.filter(id__in=[int(job_id) for job_id in results]).values_list('id', flat=True)
+    )
+    missing = [job_id for job_id in results if int(job_id) not in existing_ids]
+    if missing:
+        logger.warning(f"Content batch {batch_id}: skipping results for deleted uploads {missing}")
+    
+    # One multi-row INSERT instead of a create() per file (PKs are returned on PostgreSQL)
+    generated = GeneratedContent.objects.bulk_create([
+        GeneratedContent(
+            user=user,
+            uploaded_file_id=int(job_id),
+            content_json=content_json,
+            model_used=ai_wrapper.AI_PROVIDER,
+            trends_used=trends_used.get(job_id, [])
+        )
+        for job_id, content_json in results.items()
+        if int(job_id) in existing_ids
+    ], batch_size=BULK_CREATE_BATCH_SIZE)
+    content_ids = {str(row.uploaded_file_id): row.id for row in generated}
+    
+    logger.info(f"Content batch {batch_id} stored {len(content_ids)} results")
+    return {'status': 'completed', 'batch_id': batch_id, 'content_ids': content_ids}
@@ -0,0 +1,93 @@
+import orjson
+import pytest
+
+from apps.generator.openai_wrapper import JSONMemberScanner
+
+SOCIAL_PACK = {
+    "linkedin": {"post_text": 'He said "ship it" \\ then left', "hashtags": ["#ai", "#ops"]},
+    "x_thread": ["1/ Brackets ] and } in a string", 'Quote \\" and comma, inside', {"nested": [1, [2, 3]]}],
+    "empty": [],
+    "threads_post": [],
+    "youtube": {"title": "{not: json}", "script": "a\\nb"},
+}
+
+
+def scan(chunks, item_keys=("x_thread",)):
+    scanner = JSONMemberScanner(item_keys=item_keys)
+    events = []
+    for chunk in chunks:
+        events.extend(scanner.feed(chunk))
+    return scanner, events
+
+
+def members(events):
+    return {event[1]: event[2] for event in events if event[0] == "member"}
+
+
+def items(events):
+    return [(event[2], event[3]) for event in events if event[0] == "item"]
+
+
+def test_members_and_items_in_one_chunk():
+    text = orjson.dumps(SOCIAL_PACK).decode()
+    scanner, events = scan([text])
+    assert members(events) == SOCIAL_PACK
+    assert items(events) == list(enumerate(SOCIAL_PACK["x_thread"]))
+    assert scanner.text == text
+
+
+def test_escaped_quotes_and_backslashes():
+    value = {"a": 'x\\"y', "b": "\\\\", "c": '"'}
+    _, events = scan([orjson.dumps(value).decode()])
+    assert members(events) == value
+
+
+def test_brackets_and_commas_inside_strings():
+    value = {"a": "[{,}]", "b": "]]}},"}
+    _, events = scan([orjson.dumps(value).decode()], item_keys=("a",))
+    assert members(events) == value
+    assert items(events) == []
+
+
+def test_nested_values():
+    value = {"outer": {"inner": {"deep": [1, {"x": [2]}]}}, "list": [[1], [2, [3]]]}
+    _, events = scan([orjson.dumps(value).decode()], item_keys=("list",))
+    assert members(events) == value
+    assert items(events) == [(0, [1]), (1, [2, [3]])]
+
+
+def test_empty_arrays_and_object():
+    _, events = scan(['{"x_thread": [], "other": []}'])
+    assert members(events) == {"x_thread": [], "other": []}
+    assert items(events) == []
+    assert scan(["{}"])[1] == []
+
+
+def test_members_emitted_as_they_close():
+    scanner = JSONMemberScanner()
+    assert scanner.feed('{"a": 1, "b": {"c"') == [("member", "a", 1)]
+    assert scanner.feed(': 2}') == []
+    assert scanner.feed('}') == [("member", "b", {"c": 2})]
+
+
+def test_pretty_printed_with_fence():
+    text = "```json\n" + orjson.dumps(SOCIAL_PACK, option=orjson.OPT_INDENT_2).decode() + "\n```"
+    _, events = scan([text])
+    assert members(events) == SOCIAL_PACK
+
+
+@pytest.mark.parametrize("split", range(len(orjson.dumps(SOCIAL_PACK))))
+def test_two_chunk_split_at_every_offset(split):
+    text = orjson.dumps(SOCIAL_PACK).decode()
+    scanner, events = scan([text[:split], text[split:]])
+    assert members(events) == SOCIAL_PACK
+    assert items(events) == list(enumerate(SOCIAL_PACK["x_thread"]))
+    assert scanner.text == text
+
+
+def test_one_character_chunks():
+    text = orjson.dumps(SOCIAL_PACK, option=orjson.OPT_INDENT_2).decode()
+    scanner, events = scan(list(text))
+    assert members(events) == SOCIAL_PACK
+    assert items(events) == list(enumerate(SOCIAL_PACK["x_thread"]))
+    assert scanner.text == text
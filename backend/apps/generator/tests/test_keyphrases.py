@@ -0,0 +1,39 @@
+from apps.generator.keyphrases import extract_keyphrase
+
+
+def test_acronym_phrase_is_kept():
+    text = (
+        "AI agents are changing customer support. Teams deploy AI agents to triage tickets. "
+        "Customer support leaders say AI agents cut wait times, and customer support costs "
+        "drop as AI agents scale."
+    )
+    assert extract_keyphrase(text) == "AI Agents"
+
+
+def test_two_letter_acronyms():
+    text = "ML models need UX research. ML models fail without UX research. ML models and UX research."
+    assert extract_keyphrase(text) in {"ML Models", "UX Research"}
+
+
+def test_longer_acronym_keeps_its_case():
+    text = "The API gateway routes calls. An API gateway caches. Our API gateway scales."
+    assert extract_keyphrase(text) == "API Gateway"
+
+
+def test_capitalized_words_are_title_cased():
+    text = "Remote work is here. Remote work tools matter. Remote work culture wins."
+    assert extract_keyphrase(text) == "Remote Work"
+
+
+def test_short_lowercase_words_break_phrases():
+    text = "go big data. go big data. go big data. ok vs ok vs ok vs ok vs."
+    assert extract_keyphrase(text) == "Big Data"
+
+
+def test_stopwords_still_filtered_when_uppercase():
+    assert extract_keyphrase("IT IS ON. IT IS ON. IT IS ON.") is None
+
+
+def test_no_recurring_phrase_returns_none():
+    assert extract_keyphrase("A single sentence about cloud pricing.") is None
+    assert extract_keyphrase("") is None
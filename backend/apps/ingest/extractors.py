@@ -3,17 +3,172 @@ Pure Python Text Extraction
 Optimized for compatibility without binary dependencies.
 """
 import io
+import os
+import re
+import asyncio
+import hashlib
 import logging
+import threading
+import weakref
 import zipfile
-import xml.etree.ElementTree as ET
+import concurrent.futures
+import multiprocessing
 from typing import Optional
-import requests
+import httpx
 from bs4 import BeautifulSoup
 from pypdf import PdfReader
 from docx import Document as DocxDocument
+from django.core.cache import cache
+
+try:
+    from lxml import etree  # C parser; streams slides far faster than ElementTree
+    HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as etree
+    HAS_LXML = False
+
+try:
+    from selectolax.parser import HTMLParser  # lexbor C parser; BeautifulSoup is the fallback
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
 
 logger = logging.getLogger(__name__)
 
+# PowerPoint text runs <a:t>
+PPTX_TEXT_TAG = '{http://schemas.openxmlformats.org/drawingml/2006/main}t'
+SLIDE_BREAK = "\n\n--- SLIDE BREAK ---\n\n"
+# Page chrome dropped before taking text from a URL
+URL_STRIP_TAGS = ["script", "style", "nav", "footer", "header"]
+# Whitespace around line breaks, or a run of 2+ spaces, becomes one newline
+_RE_TEXT_BREAKS = re.compile(r'\s*\n\s*| {2,}\s*')
+# Decks at least this long are parsed on a thread pool (lxml only)
+PPTX_PARALLEL_MIN_SLIDES = 8
+PPTX_PARSE_WORKERS = 8
+
+
+def _parse_slide(zf: zipfile.ZipFile, slide: str) -> str:
+    """Text of every <a:t> node in one slide, newline-joined."""
+    # Parse straight off the decompression stream: the inflated XML is never held as bytes
+    with zf.open(slide) as xml_file:
+        if HAS_LXML:
+            # Inflate (zlib) and parse (libxml2) both run in C, so slides overlap on threads;
+            # a single slide's tree is small
+            nodes = etree.parse(xml_file).getroot().iter(PPTX_TEXT_TAG)
+            return "\n".join(node.text for node in nodes if node.text)
+        
+        # ElementTree: stream the <a:t> nodes instead of building the tree
+        texts = []
+        for _, elem in etree.iterparse(xml_file):
+            if elem.tag == PPTX_TEXT_TAG and elem.text:
+                texts.append(elem.text)
+            elem.clear()
+        return "\n".join(texts)
+
+
+# --- POOLED HTTP CLIENTS FOR URL EXTRACTION ---
+URL_HTTP_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+URL_HTTP_TIMEOUT = 10
+URL_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+
+_url_client = None
+_url_client_pid = None
+_url_client_lock = threading.Lock()
+# One AsyncClient per event loop (an httpx pool cannot be shared across loops)
+_url_aclients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _client_kwargs() -> dict:
+    return dict(
+        http2=True,
+        timeout=URL_HTTP_TIMEOUT,
+        headers=URL_HTTP_HEADERS,
+        limits=URL_HTTP_LIMITS,
+        follow_redirects=True,
+    )
+
+
+def get_url_client() -> httpx.Client:
+    """Keep-alive HTTP/2 client reused across URL extractions in this process."""
+    global _url_client, _url_client_pid
+    with _url_client_lock:
+        if _url_client is None or _url_client_pid != os.getpid():
+            # (Re)create after fork: pooled sockets must not be shared with the parent
+            _url_client = httpx.Client(**_client_kwargs())
+            _url_client_pid = os.getpid()
+    return _url_client
+
+
+def get_url_aclient() -> httpx.AsyncClient:
+    """Keep-alive HTTP/2 AsyncClient bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    aclient = _url_aclients.get(loop)
+    if aclient is None:
+        aclient = httpx.AsyncClient(**_client_kwargs())
+        _url_aclients[loop] = aclient
+    return aclient
+
+
+# Re-uploads of an identical document reuse its extracted text for a week
+EXTRACT_CACHE_TTL = 7 * 86400
+# Formats worth caching (txt extraction is a plain decode, cheaper than the lookup)
+CACHED_FILE_TYPES = {'pdf', 'docx', 'pptx'}
+
+
+def extract_cache_key(file_type: str, file_content: bytes) -> str:
+    return f"extract:{file_type}:{hashlib.blake2b(file_content, digest_size=16).hexdigest()}"
+
+
+# PDFs shorter than this are extracted in-process; shipping them to workers costs more than it saves
+PDF_PARALLEL_MIN_PAGES = 10
+PDF_WORKERS = min(4, os.cpu_count() or 1)
+
+_pdf_pool = None
+_pdf_pool_pid = None
+_pdf_pool_lock = threading.Lock()
+
+
+def get_pdf_pool() -> Optional[concurrent.futures.ProcessPoolExecutor]:
+    """Long-lived PDF worker pool for this process, or None where one can't be used.
+
+    Workers come from a forkserver (spawn where unavailable), never a fork of this process,
+    which may already be running the agents loop thread and live HTTP pools.
+    """
+    global _pdf_pool, _pdf_pool_pid
+    if PDF_WORKERS < 2 or multiprocessing.current_process().daemon:
+        # Daemonic processes (Celery prefork children) are not allowed to have children
+        return None
+    with _pdf_pool_lock:
+        if _pdf_pool is None or _pdf_pool_pid != os.getpid():
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pdf_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=PDF_WORKERS,
+                mp_context=multiprocessing.get_context(method),
+            )
+            _pdf_pool_pid = os.getpid()
+    return _pdf_pool
+
+
+def _reset_pdf_pool():
+    """Drop a broken pool (e.g. a worker died) so the next PDF builds a fresh one."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown(wait=False, cancel_futures=True)
+            _pdf_pool = None
+
+
+def _extract_pdf_pages(file_content: bytes, start: int, end: int) -> list:
+    """Text of pages [start, end); runs in a worker process with its own reader."""
+    reader = PdfReader(io.BytesIO(file_content))
+    texts = []
+    for i in range(start, end):
+        content = reader.pages[i].extract_text()
+        if content:
+            texts.append(content)
+    return texts
+
+
 class TextExtractor:
     
     @staticmethod
@@ -22,6 +177,23 @@ class TextExtractor:
         try:
             pdf_stream = io.BytesIO(file_content)
             reader = PdfReader(pdf_stream)
+            page_count = len(reader.pages)
+            
+            pool = get_pdf_pool() if page_count >= PDF_PARALLEL_MIN_PAGES else None
+            if pool is not None:
+                # pypdf is pure-Python and CPU-bound: shard page ranges across the worker pool
+                step = -(-page_count // PDF_WORKERS)
+                starts = list(range(0, page_count, step))
+                ends = [min(start + step, page_count) for start in starts]
+                try:
+                    shards = pool.map(_extract_pdf_pages, [file_content] * len(starts), starts, ends)
+                    return "\n\n".join(text for shard in shards for text in shard)
+                except concurrent.futures.process.BrokenProcessPool as e:
+                    logger.warning(f"PDF process pool broke, extracting serially: {e}")
+                    _reset_pdf_pool()
+                except Exception as e:
+                    logger.warning(f"Parallel PDF extraction failed, extracting serially: {e}")
+            
             text = []
             for page in reader.pages:
                 content = page.extract_text()
@@ -50,57 +222,64 @@ class TextExtractor:
         """
         try:
             f = io.BytesIO(file_content)
-            text_content = []
             
             with zipfile.ZipFile(f) as zf:
                 # Find all slide XML files
                 slide_files = [n for n in zf.namelist() if n.startswith("ppt/slides/slide") and n.endswith(".xml")]
                 # Sort to maintain order (slide1, slide2, ...)
                 slide_files.sort(key=lambda x: int(x.replace("ppt/slides/slide", "").replace(".xml", "")))
-
-                # XML namespace for PowerPoint text
-                ns = {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'}
-
-                for slide in slide_files:
-                    xml_content = zf.read(slide)
-                    root = ET.fromstring(xml_content)
-                    
-                    # Find all text bodies <a:t>
-                    slide_text = []
-                    for node in root.findall('.//a:t', ns):
-                        if node.text:
-                            slide_text.append(node.text)
-                    
-                    if slide_text:
-                        text_content.append("\n".join(slide_text))
+                
+                if HAS_LXML and len(slide_files) >= PPTX_PARALLEL_MIN_SLIDES:
+                    # ZipFile supports concurrent readers; map() keeps slide order
+                    with concurrent.futures.ThreadPoolExecutor(max_workers=PPTX_PARSE_WORKERS) as executor:
+                        slide_texts = list(executor.map(lambda slide: _parse_slide(zf, slide), slide_files))
+                else:
+                    slide_texts = [_parse_slide(zf, slide) for slide in slide_files]
             
-            return "\n\n--- SLIDE BREAK ---\n\n".join(text_content)
+            return SLIDE_BREAK.join(text for text in slide_texts if text)
 
         except Exception as e:
             logger.error(f"PPTX Error: {e}")
             return ""
 
     @staticmethod
-    def extract_from_url(url: str) -> str:
-        """Extract from URL using BeautifulSoup (Pure Python parser)"""
-        try:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(url, timeout=10, headers=headers)
-            response.raise_for_status()
-            
+    def html_to_text(html: str) -> str:
+        """Visible page text using selectolax (BeautifulSoup when unavailable)"""
+        if HAS_SELECTOLAX:
+            tree = HTMLParser(html)
+            # Remove scripts, styles and page chrome in C
+            tree.strip_tags(URL_STRIP_TAGS)
+            text = (tree.body or tree.root).text(separator='\n')
+        else:
             # Use 'html.parser' instead of 'lxml' to avoid C++ errors
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove scripts and styles
-            for script in soup(["script", "style", "nav", "footer", "header"]):
+            soup = BeautifulSoup(html, 'html.parser')
+            for script in soup(URL_STRIP_TAGS):
                 script.decompose()
-                
             text = soup.get_text(separator='\n')
+        
+        # Clean whitespace
+        return _RE_TEXT_BREAKS.sub('\n', text).strip()
+
+    @classmethod
+    def extract_from_url(cls, url: str) -> str:
+        """Extract from URL over the pooled keep-alive client"""
+        try:
+            response = get_url_client().get(url)
+            response.raise_for_status()
+            return cls.html_to_text(response.text)
             
-            # Clean whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            return '\n'.join(chunk for chunk in chunks if chunk)
+        except Exception as e:
+            logger.error(f"URL Error: {e}")
+            return ""
+
+    @classmethod
+    async def extract_from_url_async(cls, url: str) -> str:
+        """Async sibling of extract_from_url; gather() it for batch URL ingest"""
+        try:
+            response = await get_url_aclient().get(url)
+            response.raise_for_status()
+            # Parsing is CPU-bound: keep it off the event loop
+            return await asyncio.to_thread(cls.html_to_text, response.text)
             
         except Exception as e:
             logger.error(f"URL Error: {e}")
@@ -124,7 +303,27 @@ class TextExtractor:
             'pptx': cls.extract_from_pptx,
             'txt': cls.extract_from_txt
         }
-        return extractors.get(file_type, lambda x: "")(file_content)
+        extractor = extractors.get(file_type, lambda x: "")
+        if file_type not in CACHED_FILE_TYPES:
+            return extractor(file_content)
+        
+        # Memoized by content hash: the same file re-uploaded skips pypdf/XML parsing
+        cache_key = extract_cache_key(file_type, file_content)
+        try:
+            cached = cache.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Extraction cache lookup failed: {e}")
+            cached = None
+        if cached is not None:
+            return cached
+        
+        text = extractor(file_content)
+        if text:  # extractors return "" on failure; don't pin that
+            try:
+                cache.set(cache_key, text, timeout=EXTRACT_CACHE_TTL)
+            except Exception as e:
+                logger.warning(f"Extraction cache store failed: {e}")
+        return text
 
 def count_words(text: str) -> int:
     return len(text.split())
\ No newline at end of file
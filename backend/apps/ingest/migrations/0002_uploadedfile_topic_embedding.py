@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-16 10:12
+
+import pgvector.django.vector
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingest', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='topic_embedding',
+            field=pgvector.django.vector.VectorField(blank=True, null=True),
+        ),
+    ]
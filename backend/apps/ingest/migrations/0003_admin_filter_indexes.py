@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-16 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingest', '0002_uploadedfile_topic_embedding'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uploadedfile',
+            name='file_type',
+            field=models.CharField(choices=[('pdf', 'PDF'), ('docx', 'Word Document'), ('pptx', 'PowerPoint'), ('txt', 'Text File'), ('video', 'Video'), ('url', 'URL')], db_index=True, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='uploadedfile',
+            name='detected_topic',
+            field=models.CharField(blank=True, db_index=True, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='generatedcontent',
+            name='model_used',
+            field=models.CharField(db_index=True, default='gemini-1.5-flash', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='uploadedfile',
+            index=models.Index(fields=['-uploaded_at'], name='uploadedfile_uploaded_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='generatedcontent',
+            index=models.Index(fields=['-created_at'], name='generated_created_at_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
+from pgvector.django import VectorField
 
 
 class UploadedFile(models.Model):
@@ -18,7 +19,7 @@ class UploadedFile(models.Model):
         ('url', 'URL'),
     ]
     
-    file_type = models.CharField(max_length=20, choices=FILE_TYPE_CHOICES)
+    file_type = models.CharField(max_length=20, choices=FILE_TYPE_CHOICES, db_index=True)
     original_filename = models.CharField(max_length=500, blank=True)
     file = models.FileField(upload_to='uploads/%Y/%m/%d/', null=True, blank=True)
     url = models.URLField(blank=True)
@@ -26,7 +27,10 @@ class UploadedFile(models.Model):
     # Extracted content
     extracted_text = models.TextField()
     word_count = models.IntegerField(default=0)
-    detected_topic = models.CharField(max_length=200, blank=True)
+    detected_topic = models.CharField(max_length=200, blank=True, db_index=True)
+    # Embedding of detected_topic, reused as the trend search query vector.
+    # No fixed dimensions: the size follows the configured embedding provider
+    topic_embedding = VectorField(null=True, blank=True)
     
     # Metadata
     uploaded_at = models.DateTimeField(default=timezone.now)
@@ -34,6 +38,10 @@ class UploadedFile(models.Model):
     
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            # Default ordering (API listings, admin changelist)
+            models.Index(fields=['-uploaded_at'], name='uploadedfile_uploaded_at_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_file_type_display()} - {self.original_filename or self.url or 'Text'}"
@@ -55,13 +63,16 @@ class GeneratedContent(models.Model):
     content_json = models.JSONField()
     
     # Metadata
-    model_used = models.CharField(max_length=100, default='gemini-1.5-flash')
+    model_used = models.CharField(max_length=100, default='gemini-1.5-flash', db_index=True)
     trends_used = models.JSONField(default=list)
     
     created_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='generated_created_at_idx'),
+        ]
     
     def __str__(self):
         return f"Generated content for {self.uploaded_file}"
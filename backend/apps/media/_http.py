@@ -0,0 +1,140 @@
+"""
+Shared HTTP plumbing for the image providers (Nano Banana, Freepik, Fal.ai)
+One keep-alive pool per process, the streaming base64 image download, a per-provider
+circuit breaker and the generated-image cache
+"""
+import base64
+import hashlib
+import logging
+import os
+import threading
+import time
+import httpx
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 keep-alive pool shared by every submit/poll/download in this process: a job's
+# status polls and parallel downloads from one CDN multiplex over a single TLS connection.
+# Transport retries cover connection failures only, so a generation is never submitted twice.
+HTTP_TIMEOUT = httpx.Timeout(connect=5, read=15, write=5, pool=10)
+HTTP_LIMITS = httpx.Limits(max_connections=16, max_keepalive_connections=8)
+HTTP_CONNECT_RETRIES = 2
+
+# Per-call timeouts: connect is capped on its own so a dead provider fails over in ~3s,
+# while the read budget fits the call (job submit, status poll, image download)
+CONNECT_TIMEOUT = 3.05
+SUBMIT_TIMEOUT = httpx.Timeout(10, connect=CONNECT_TIMEOUT)
+POLL_TIMEOUT = httpx.Timeout(5, connect=CONNECT_TIMEOUT)
+DOWNLOAD_TIMEOUT = httpx.Timeout(30, connect=CONNECT_TIMEOUT)
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> httpx.Client:
+    """Keep-alive HTTP/2 client reused across image provider calls in this process."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            # (Re)create after fork: pooled sockets must not be shared with the parent
+            _client = httpx.Client(
+                transport=httpx.HTTPTransport(http2=True, limits=HTTP_LIMITS, retries=HTTP_CONNECT_RETRIES),
+                timeout=HTTP_TIMEOUT,
+                follow_redirects=True,
+            )
+            _client_pid = os.getpid()
+    return _client
+
+
+# Multiple of 3, so every chunk base64-encodes on its own with no padding until the end
+B64_CHUNK_SIZE = 48 * 1024
+
+
+def fetch_b64(url: str):
+    """Download an image and base64-encode it chunk by chunk, without holding the raw bytes.
+
+    Returns the ASCII base64 as a bytearray (no str copy). Raises on any failure.
+    """
+    with get_client().stream('GET', url, timeout=DOWNLOAD_TIMEOUT) as response:
+        response.raise_for_status()
+        encoded = bytearray()
+        carry = b''
+        for chunk in response.iter_bytes(chunk_size=B64_CHUNK_SIZE):
+            if carry:
+                chunk = carry + chunk
+            cut = len(chunk) - len(chunk) % 3
+            encoded += base64.b64encode(memoryview(chunk)[:cut])
+            carry = chunk[cut:]
+        encoded += base64.b64encode(carry)
+        return encoded
+
+
+def download_b64(url: str):
+    """fetch_b64 for executor.map: logs and returns None instead of raising."""
+    try:
+        return fetch_b64(url)
+    except Exception as e:
+        logger.error(f"Image download failed for {url}: {e}")
+        return None
+
+
+# Circuit breaker: after CIRCUIT_FAILURE_THRESHOLD failed calls in a row, fail fast for
+# CIRCUIT_COOLDOWN seconds instead of waiting out timeouts against a provider that is down
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_COOLDOWN = 60
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one provider; each provider module holds its own instance."""
+
+    def __init__(self, threshold: int = CIRCUIT_FAILURE_THRESHOLD, cooldown: float = CIRCUIT_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        with self._lock:
+            return (self._failures >= self.threshold
+                    and time.monotonic() - self._opened_at < self.cooldown)
+
+    def record(self, success: bool):
+        """Close the circuit on success; (re)open it once failures reach the threshold."""
+        with self._lock:
+            if success:
+                self._failures = 0
+            else:
+                self._failures += 1
+                if self._failures >= self.threshold:
+                    self._opened_at = time.monotonic()
+
+
+# Identical prompts (preview regeneration, task retries) reuse the generated images for an hour
+IMAGE_CACHE_TTL = 3600
+
+
+def cached_images(provider: str, key: str, fn):
+    """Serve a provider's images for `key` from the Django cache, else call fn() and cache a success.
+
+    fn returns the provider result dict ({'status', 'images'/'error'}); failures are never cached.
+    """
+    cache_key = f"images:{provider}:{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}"
+    try:
+        cached = cache.get(cache_key)
+    except Exception as e:
+        logger.warning(f"{provider} image cache lookup failed: {e}")
+        cached = None
+    if cached is not None:
+        logger.info(f"{provider} images served from cache")
+        return {'status': 'success', 'images': list(cached)}
+
+    result = fn()
+    if result.get('status') == 'success':
+        try:
+            cache.set(cache_key, result['images'], timeout=IMAGE_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"{provider} image cache store failed: {e}")
+    return result
@@ -2,21 +2,31 @@
 AI-Powered Design Analyzer
 Analyzes content and generates innovative design specifications for frames and collages
 """
+import hashlib
 import logging
-import openai
-from django.conf import settings
-import json
-import re
-from typing import Dict, List, Tuple
+import orjson
+from typing import Dict
+from django.core.cache import cache
+
+# Shares the generator's pooled HTTP/2 AsyncOpenAI client, concurrency cap and 429 backoff
+from apps.generator.openai_wrapper import create_chat_completion_sync
 
 logger = logging.getLogger(__name__)
 
-openai.api_key = settings.OPENAI_API_KEY
+# Analyses are reused across retries and repeat requests for the same content (one LLM call per text)
+ANALYSIS_CACHE_TTL = 60 * 60 * 24
+
+
+def _analysis_cache_key(text: str) -> str:
+    return f"design-analysis:{hashlib.blake2b(text.encode(), digest_size=16).hexdigest()}"
 
 
 class DesignAnalyzer:
     """Analyzes content and generates context-aware design specifications"""
     
+    # Frame styles drawn with the wider 50px border
+    WIDE_FRAME_STYLES = frozenset({'elegant', 'luxury'})
+    
     # Design themes based on content analysis
     DESIGN_THEMES = {
         'tech': {
@@ -69,6 +79,29 @@ class DesignAnalyzer:
         }
     }
     
+    # Strict structured output: the API guarantees a parseable object of exactly this shape
+    ANALYSIS_RESPONSE_FORMAT = {
+        'type': 'json_schema',
+        'json_schema': {
+            'name': 'DesignAnalysis',
+            'strict': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'primary_theme': {'type': 'string', 'enum': list(DESIGN_THEMES)},
+                    'mood': {'type': 'string', 'enum': ['professional', 'energetic', 'calm', 'bold', 'elegant', 'modern', 'playful', 'serious']},
+                    'color_scheme': {'type': 'string'},
+                    'industry': {'type': 'string'},
+                    'design_style': {'type': 'string', 'enum': ['minimal', 'maximalist', 'geometric', 'organic', 'industrial', 'artistic']},
+                    'key_concepts': {'type': 'array', 'items': {'type': 'string'}},
+                    'visual_metaphors': {'type': 'array', 'items': {'type': 'string'}},
+                },
+                'required': ['primary_theme', 'mood', 'color_scheme', 'industry', 'design_style', 'key_concepts', 'visual_metaphors'],
+                'additionalProperties': False,
+            },
+        },
+    }
+    
     @staticmethod
     def analyze_content(text: str) -> Dict:
         """
@@ -84,42 +117,48 @@ class DesignAnalyzer:
             # Truncate text if too long
             analysis_text = text[:3000] if len(text) > 3000 else text
             
+            cache_key = _analysis_cache_key(analysis_text)
+            try:
+                cached = cache.get(cache_key)
+            except Exception as e:
+                logger.warning(f"Design analysis cache lookup failed: {e}")
+                cached = None
+            if cached is not None:
+                logger.info(f"Content analysis served from cache: {cached.get('primary_theme', 'unknown')}")
+                return cached
+            
             prompt = f"""Analyze this content and provide design recommendations for image frames and collages.
 
 Content:
 {analysis_text}
 
-Provide a JSON response with:
-1. primary_theme: One of [tech, business, creative, luxury, health, education, entertainment, finance]
-2. mood: One of [professional, energetic, calm, bold, elegant, modern, playful, serious]
-3. color_scheme: Description of ideal colors (warm, cool, vibrant, muted, etc.)
-4. industry: The industry or field this content relates to
-5. design_style: One of [minimal, maximalist, geometric, organic, industrial, artistic]
-6. key_concepts: List of 3-5 key themes from the content
-7. visual_metaphors: 2-3 visual metaphors that could represent this content
-
-Return only valid JSON, no other text."""
+Provide:
+- color_scheme: Description of ideal colors (warm, cool, vibrant, muted, etc.)
+- industry: The industry or field this content relates to
+- key_concepts: 3-5 key themes from the content
+- visual_metaphors: 2-3 visual metaphors that could represent this content
+plus the best-fitting primary_theme, mood and design_style."""
 
-            response = openai.chat.completions.create(
+            response = create_chat_completion_sync(
                 model="gpt-4o-mini",
                 messages=[
-                    {"role": "system", "content": "You are a design expert who analyzes content and recommends visual design specifications. Always respond with valid JSON only."},
+                    {"role": "system", "content": "You are a design expert who analyzes content and recommends visual design specifications."},
                     {"role": "user", "content": prompt}
                 ],
+                response_format=DesignAnalyzer.ANALYSIS_RESPONSE_FORMAT,
                 temperature=0.7,
                 max_tokens=500
             )
             
-            result_text = response.choices[0].message.content.strip()
-            
-            # Extract JSON from response
-            json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-            if json_match:
-                analysis = json.loads(json_match.group())
-            else:
-                analysis = json.loads(result_text)
+            # Schema-constrained output parses directly; refusals/truncation fall to the default below
+            analysis = orjson.loads(response.choices[0].message.content)
             
             logger.info(f"Content analysis complete: {analysis.get('primary_theme', 'unknown')}")
+            # Only real analyses are cached; the fallback below is retried next time
+            try:
+                cache.set(cache_key, analysis, timeout=ANALYSIS_CACHE_TTL)
+            except Exception as e:
+                logger.warning(f"Design analysis cache store failed: {e}")
             return analysis
             
         except Exception as e:
@@ -150,18 +189,24 @@ Return only valid JSON, no other text."""
         theme = analysis.get('primary_theme', 'business')
         theme_config = DesignAnalyzer.DESIGN_THEMES.get(theme, DesignAnalyzer.DESIGN_THEMES['business'])
         
-        # Generate frame specifications for each image
-        frame_specs = []
-        for i in range(num_images):
-            spec = {
-                'color': theme_config['colors'][i % len(theme_config['colors'])],
-                'style': theme_config['frame_style'],
-                'width': 50 if theme_config['frame_style'] in ['elegant', 'luxury'] else 40,
-                'effects': theme_config['effects'][i % len(theme_config['effects'])],
-                'border_style': DesignAnalyzer._get_border_style(theme_config['frame_style']),
-                'gradient': DesignAnalyzer._get_gradient_colors(theme_config['colors'], i)
+        # Generate frame specifications for each image (per-theme lookups hoisted out of the loop)
+        colors = theme_config['colors']
+        effects = theme_config['effects']
+        frame_style = theme_config['frame_style']
+        border_style = DesignAnalyzer._get_border_style(frame_style)
+        width = 50 if frame_style in DesignAnalyzer.WIDE_FRAME_STYLES else 40
+        n_colors, n_effects = len(colors), len(effects)
+        frame_specs = [
+            {
+                'color': colors[i % n_colors],
+                'style': frame_style,
+                'width': width,
+                'effects': effects[i % n_effects],
+                'border_style': border_style,
+                'gradient': (colors[i % n_colors], colors[(i + 1) % n_colors])
             }
-            frame_specs.append(spec)
+            for i in range(num_images)
+        ]
         
         # Generate collage specifications
         collage_spec = {
@@ -201,13 +246,6 @@ Return only valid JSON, no other text."""
         }
         return style_map.get(frame_style, 'solid')
     
-    @staticmethod
-    def _get_gradient_colors(colors: List[str], index: int) -> Tuple[str, str]:
-        """Generate gradient color pair"""
-        primary = colors[index % len(colors)]
-        secondary = colors[(index + 1) % len(colors)]
-        return (primary, secondary)
-    
     @staticmethod
     def _get_background_color(theme: str, mood: str) -> str:
         """Get background color based on theme and mood"""
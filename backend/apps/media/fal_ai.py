@@ -2,12 +2,125 @@
 Fal.ai Image Generation Module (Fallback Provider)
 Using Fal.ai API for AI-powered image generation when primary provider fails
 """
-import requests
+import orjson
+import httpx
 import logging
+import time
+import concurrent.futures
 from django.conf import settings
+from ._http import CircuitBreaker, cached_images, get_client, download_b64, SUBMIT_TIMEOUT, POLL_TIMEOUT
 
 logger = logging.getLogger(__name__)
 
+# Resolved once at import rather than through LazySettings on every call
+_API_KEY = getattr(settings, 'FAL_API_KEY', '5d450066-99db-4a1e-9107-ee5032d5b629:15e0ab78d00922abe0118e6eff0c80f1')
+_HEADERS = {
+    'Authorization': f'Key {_API_KEY}',
+    'Content-Type': 'application/json'
+}
+
+# Collage prompt; {} is the source text preview
+_FAL_PROMPT_TMPL = (
+    "Create a professional, modern image that represents: {}. "
+    "Style: Clean, corporate, high-quality, professional photography. "
+    "No text or watermarks."
+)
+
+# Flux Pro queue endpoints; {} is the request_id
+_FAL_SUBMIT_URL = "https://queue.fal.run/fal-ai/flux-pro/v1.1"
+_FAL_STATUS_FMT = "https://queue.fal.run/fal-ai/flux-pro/v1.1/requests/{}/status"
+_FAL_RESULT_FMT = "https://queue.fal.run/fal-ai/flux-pro/v1.1/requests/{}"
+
+# Status polling: 250ms, growing 1.5x up to 2s, for at most 45s per job
+POLL_INITIAL_DELAY = 0.25
+POLL_BACKOFF = 1.5
+POLL_MAX_DELAY = 2.0
+POLL_DEADLINE = 45
+
+
+# Fal.ai trips on its own, so a Freepik outage never blocks this fallback
+_circuit = CircuitBreaker()
+
+
+def _generate_urls(prompt: str, size: str, count: int) -> list:
+    """Submit one Flux Pro job for `count` images, poll it to completion and return the image URLs.
+
+    Returns [] on API errors; httpx timeouts propagate to the caller.
+    """
+    try:
+        payload = {
+            "prompt": prompt,
+            "image_size": size,
+            "num_inference_steps": 28,
+            "guidance_scale": 3.5,
+            "num_images": count,
+            "enable_safety_checker": True,
+            "output_format": "png"
+        }
+        
+        # Submit request
+        submit_response = get_client().post(
+            _FAL_SUBMIT_URL,
+            json=payload,
+            headers=_HEADERS,
+            timeout=SUBMIT_TIMEOUT
+        )
+        
+        if submit_response.status_code != 200:
+            logger.error(f"Fal.ai submit error {submit_response.status_code}: {submit_response.text}")
+            return []
+        
+        submit_data = orjson.loads(submit_response.content)
+        request_id = submit_data.get('request_id')
+        
+        if not request_id:
+            logger.error("No request_id in Fal.ai response")
+            return []
+        
+        # Poll for result
+        status_url = _FAL_STATUS_FMT.format(request_id)
+        
+        deadline = time.monotonic() + POLL_DEADLINE
+        delay = POLL_INITIAL_DELAY
+        while time.monotonic() < deadline:
+            status_response = get_client().get(status_url, headers=_HEADERS, timeout=POLL_TIMEOUT)
+            
+            body = status_response.content
+            # Queued/in-progress bodies are skipped on a byte scan; JSON is parsed only
+            # once a terminal status string shows up, and the parsed field decides
+            if status_response.status_code == 200 and (b'"COMPLETED"' in body or b'"FAILED"' in body):
+                status_data = orjson.loads(body)
+                
+                if status_data.get('status') == 'COMPLETED':
+                    # Get the result
+                    result_response = get_client().get(_FAL_RESULT_FMT.format(request_id), headers=_HEADERS, timeout=POLL_TIMEOUT)
+                    
+                    if result_response.status_code == 200:
+                        result_data = orjson.loads(result_response.content)
+                        
+                        # Extract image URLs (keep whatever arrived, even if fewer than asked)
+                        image_urls = [img.get('url') for img in result_data.get('images') or [] if img.get('url')]
+                        logger.info(f"Fal.ai generated {len(image_urls)}/{count} images")
+                        return image_urls
+                    return []
+                    
+                elif status_data.get('status') == 'FAILED':
+                    logger.error(f"Fal.ai generation failed: {status_data.get('error')}")
+                    return []
+            
+            # Short jobs are picked up almost immediately; long ones aren't hammered
+            time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            delay = min(delay * POLL_BACKOFF, POLL_MAX_DELAY)
+        
+        logger.error(f"Fal.ai request {request_id} not completed after {POLL_DEADLINE}s")
+        
+    except httpx.TimeoutException:
+        # Reported (and counted against the circuit) by generate_image_with_fal
+        raise
+    except Exception as e:
+        logger.error(f"Error generating Fal.ai images: {e}")
+    return []
+
 
 def generate_image_with_fal(prompt: str, num_images: int = 1, size: str = "square_hd"):
     """
@@ -21,99 +134,34 @@ def generate_image_with_fal(prompt: str, num_images: int = 1, size: str = "squar
     Returns:
         dict: {
             'status': 'success' or 'failed',
-            'images': [base64_string, ...],
+            'images': [base64_bytes, ...],
             'error': error message if failed
         }
     """
-    api_key = getattr(settings, 'FAL_API_KEY', '5d450066-99db-4a1e-9107-ee5032d5b629:15e0ab78d00922abe0118e6eff0c80f1')
+    return cached_images(
+        "Fal.ai",
+        f"{num_images}:{size}:{prompt}",
+        lambda: _generate_images(prompt, num_images, size),
+    )
+
+
+def _generate_images(prompt: str, num_images: int, size: str):
+    """Uncached body of generate_image_with_fal: circuit check, generation and download."""
+    if _circuit.is_open():
+        logger.warning("Fal.ai circuit open after repeated failures, skipping")
+        return {'status': 'failed', 'error': 'Fal.ai temporarily unavailable (circuit open)'}
     
     try:
         # Fal.ai uses a queue-based system
-        # First, submit the generation request
-        submit_url = "https://queue.fal.run/fal-ai/flux-pro/v1.1"
-        
-        headers = {
-            'Authorization': f'Key {api_key}',
-            'Content-Type': 'application/json'
-        }
-        
-        # Generate multiple images by making separate requests
-        all_images = []
+        # One job generates every image server-side (a single submit and poll loop)
+        count = max(1, min(num_images, 4))
+        image_urls = _generate_urls(prompt, size, count)
         
-        for i in range(min(num_images, 4)):
-            try:
-                payload = {
-                    "prompt": prompt,
-                    "image_size": size,
-                    "num_inference_steps": 28,
-                    "guidance_scale": 3.5,
-                    "num_images": 1,
-                    "enable_safety_checker": True,
-                    "output_format": "png"
-                }
-                
-                # Submit request
-                submit_response = requests.post(
-                    submit_url,
-                    json=payload,
-                    headers=headers,
-                    timeout=10
-                )
-                
-                if submit_response.status_code != 200:
-                    logger.error(f"Fal.ai submit error {submit_response.status_code}: {submit_response.text}")
-                    continue
-                
-                submit_data = submit_response.json()
-                request_id = submit_data.get('request_id')
-                
-                if not request_id:
-                    logger.error("No request_id in Fal.ai response")
-                    continue
-                
-                # Poll for result (synchronous for now)
-                status_url = f"https://queue.fal.run/fal-ai/flux-pro/v1.1/requests/{request_id}/status"
-                
-                import time
-                max_attempts = 30  # 30 seconds max
-                for attempt in range(max_attempts):
-                    status_response = requests.get(status_url, headers=headers, timeout=5)
-                    
-                    if status_response.status_code == 200:
-                        status_data = status_response.json()
-                        
-                        if status_data.get('status') == 'COMPLETED':
-                            # Get the result
-                            result_url = f"https://queue.fal.run/fal-ai/flux-pro/v1.1/requests/{request_id}"
-                            result_response = requests.get(result_url, headers=headers, timeout=5)
-                            
-                            if result_response.status_code == 200:
-                                result_data = result_response.json()
-                                
-                                # Extract image URL and convert to base64
-                                if 'images' in result_data and len(result_data['images']) > 0:
-                                    image_url = result_data['images'][0].get('url')
-                                    
-                                    if image_url:
-                                        # Download image and convert to base64
-                                        img_response = requests.get(image_url, timeout=15)
-                                        if img_response.status_code == 200:
-                                            import base64
-                                            img_base64 = base64.b64encode(img_response.content).decode('utf-8')
-                                            all_images.append(img_base64)
-                                            logger.info(f"Successfully generated image {i+1}/{num_images}")
-                                            break
-                            
-                        elif status_data.get('status') == 'FAILED':
-                            logger.error(f"Fal.ai generation failed: {status_data.get('error')}")
-                            break
-                    
-                    time.sleep(1)  # Wait 1 second before polling again
-                
-            except Exception as e:
-                logger.error(f"Error generating image {i+1}: {e}")
-                continue
+        # Then fetch + base64 every finished image in parallel
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(image_urls))) as executor:
+            all_images = [img for img in executor.map(download_b64, image_urls) if img]
         
+        _circuit.record(bool(all_images))
         if all_images:
             logger.info(f"Successfully generated {len(all_images)} images with Fal.ai")
             return {
@@ -126,14 +174,16 @@ def generate_image_with_fal(prompt: str, num_images: int = 1, size: str = "squar
                 'error': 'No images generated'
             }
             
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         error_msg = "Fal.ai request timeout"
         logger.error(error_msg)
+        _circuit.record(False)
         return {'status': 'failed', 'error': error_msg}
     
     except Exception as e:
         error_msg = f"Fal.ai generation failed: {str(e)}"
         logger.error(error_msg)
+        _circuit.record(False)
         return {'status': 'failed', 'error': error_msg}
 
 
@@ -149,18 +199,16 @@ def generate_collage_images_with_fal(text_content: str, num_images: int = 4):
     Returns:
         dict: {
             'status': 'success' or 'failed',
-            'images': [base64_string, ...],
+            'images': [base64_bytes, ...],
             'error': error message if failed
         }
     """
     try:
         # Extract key themes from text
-        text_preview = text_content[:500] if len(text_content) > 500 else text_content
+        text_preview = text_content[:500]
         
         # Create a visual prompt
-        prompt = f"""Create a professional, modern image that represents: {text_preview}. 
-        Style: Clean, corporate, high-quality, professional photography. 
-        No text or watermarks."""
+        prompt = _FAL_PROMPT_TMPL.format(text_preview)
         
         # Generate images
         result = generate_image_with_fal(prompt, num_images=num_images, size="square_hd")
@@ -2,13 +2,113 @@
 Freepik AI Image Generation Module (Third Fallback Provider)
 Using Freepik API for AI-powered image generation
 """
-import requests
+import orjson
+import httpx
 import logging
 import time
+import concurrent.futures
 from django.conf import settings
+from ._http import CircuitBreaker, cached_images, get_client, download_b64, CONNECT_TIMEOUT
 
 logger = logging.getLogger(__name__)
 
+# Resolved once at import rather than through LazySettings on every call
+_API_KEY = getattr(settings, 'FREEPIK_API_KEY', 'FPSX4cbadf272cd1c5613a88a513914e2703')
+_HEADERS = {
+    'x-freepik-api-key': _API_KEY,
+    'Content-Type': 'application/json'
+}
+
+
+# Per-process breaker for Freepik calls
+_circuit = CircuitBreaker()
+
+
+# Collage prompt; {} is the source text preview
+_FREEPIK_PROMPT_TMPL = (
+    "Professional business image representing: {}. "
+    "High quality, modern, corporate style, professional photography. "
+    "Clean composition, no text overlays."
+)
+
+# Freepik rate-limits bursts; never have more than this many generations in flight
+FREEPIK_MAX_CONCURRENCY = 2
+# On 429, wait out Retry-After (default 2s, capped) and retry the same image this many times
+RATE_LIMIT_RETRIES = 2
+RATE_LIMIT_DEFAULT_WAIT = 2
+RATE_LIMIT_MAX_WAIT = 10
+# Freepik generates synchronously inside the submit call, so the read budget stays long
+SUBMIT_TIMEOUT = httpx.Timeout(60, connect=CONNECT_TIMEOUT)
+
+
+def _retry_after(response) -> float:
+    """Seconds to wait from a 429's Retry-After header (HTTP-date values fall back to the default)."""
+    try:
+        wait = float(response.headers.get('Retry-After', RATE_LIMIT_DEFAULT_WAIT))
+    except ValueError:
+        wait = RATE_LIMIT_DEFAULT_WAIT
+    return min(max(wait, 0.0), RATE_LIMIT_MAX_WAIT)
+
+
+def _generate_one(index: int, num_images: int, prompt: str, style: str, api_url: str):
+    """Run one Freepik text-to-image request and return its image URL (or None).
+
+    httpx timeouts are raised rather than swallowed, so the caller can report them.
+    """
+    try:
+        payload = {
+            "prompt": prompt,
+            "styling": {
+                "style": style
+            },
+            "image": {
+                "size": "square_1_1"  # 1024x1024
+            }
+        }
+        
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            # Submit generation request
+            response = get_client().post(
+                api_url,
+                json=payload,
+                headers=_HEADERS,
+                timeout=SUBMIT_TIMEOUT
+            )
+            
+            if response.status_code == 200:
+                result = orjson.loads(response.content)
+                image_url = None
+                
+                # Freepik returns image data directly
+                if 'data' in result:
+                    data = result['data'][0] if isinstance(result['data'], list) else result['data']
+                    
+                    # Get image URL
+                    image_url = data.get('image', {}).get('url') or data.get('url')
+                    
+                    if image_url:
+                        logger.info(f"Successfully generated Freepik image {index+1}/{num_images}")
+                return image_url
+                        
+            elif response.status_code == 429:
+                if attempt == RATE_LIMIT_RETRIES:
+                    logger.warning(f"Freepik rate limit reached, giving up on image {index+1}")
+                    break
+                wait = _retry_after(response)
+                logger.warning(f"Freepik rate limit reached, retrying image {index+1} in {wait:.1f}s")
+                time.sleep(wait)
+                
+            else:
+                logger.error(f"Freepik API error {response.status_code}: {response.text}")
+                break
+            
+    except httpx.TimeoutException:
+        # Re-raised through executor.map to generate_image_with_freepik's timeout branch
+        raise
+    except Exception as e:
+        logger.error(f"Error generating Freepik image {index+1}: {e}")
+    return None
+
 
 def generate_image_with_freepik(prompt: str, num_images: int = 1, style: str = "photo"):
     """
@@ -22,79 +122,41 @@ def generate_image_with_freepik(prompt: str, num_images: int = 1, style: str = "
     Returns:
         dict: {
             'status': 'success' or 'failed',
-            'images': [base64_string, ...],
+            'images': [base64_bytes, ...],
             'error': error message if failed
         }
     """
-    api_key = getattr(settings, 'FREEPIK_API_KEY', 'FPSX4cbadf272cd1c5613a88a513914e2703')
+    return cached_images(
+        "Freepik",
+        f"{num_images}:{style}:{prompt}",
+        lambda: _generate_images(prompt, num_images, style),
+    )
+
+
+def _generate_images(prompt: str, num_images: int, style: str):
+    """Uncached body of generate_image_with_freepik: circuit check, generation and download."""
+    if _circuit.is_open():
+        logger.warning("Freepik circuit open after repeated failures, skipping")
+        return {'status': 'failed', 'error': 'Freepik temporarily unavailable (circuit open)'}
     
     try:
         # Freepik AI API endpoint
         api_url = "https://api.freepik.com/v1/ai/text-to-image"
         
-        headers = {
-            'x-freepik-api-key': api_key,
-            'Content-Type': 'application/json'
-        }
-        
-        all_images = []
+        # Generate images concurrently (bounded to stay under the rate limit)
+        count = max(1, min(num_images, 4))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(count, FREEPIK_MAX_CONCURRENCY)) as executor:
+            results = executor.map(
+                lambda i: _generate_one(i, count, prompt, style, api_url),
+                range(count)
+            )
+            image_urls = [url for url in results if url]
         
-        # Generate images one by one
-        for i in range(min(num_images, 4)):
-            try:
-                payload = {
-                    "prompt": prompt,
-                    "styling": {
-                        "style": style
-                    },
-                    "image": {
-                        "size": "square_1_1"  # 1024x1024
-                    }
-                }
-                
-                # Submit generation request
-                response = requests.post(
-                    api_url,
-                    json=payload,
-                    headers=headers,
-                    timeout=60
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    
-                    # Freepik returns image data directly
-                    if 'data' in result:
-                        data = result['data'][0] if isinstance(result['data'], list) else result['data']
-                        
-                        # Get image URL
-                        image_url = data.get('image', {}).get('url') or data.get('url')
-                        
-                        if image_url:
-                            # Download image and convert to base64
-                            img_response = requests.get(image_url, timeout=15)
-                            
-                            if img_response.status_code == 200:
-                                import base64
-                                img_base64 = base64.b64encode(img_response.content).decode('utf-8')
-                                all_images.append(img_base64)
-                                logger.info(f"Successfully generated Freepik image {i+1}/{num_images}")
-                        
-                        # Rate limiting - wait between requests
-                        if i < num_images - 1:
-                            time.sleep(1)
-                            
-                elif response.status_code == 429:
-                    logger.warning("Freepik rate limit reached")
-                    break
-                    
-                else:
-                    logger.error(f"Freepik API error {response.status_code}: {response.text}")
-                    
-            except Exception as e:
-                logger.error(f"Error generating Freepik image {i+1}: {e}")
-                continue
+        # Downloads aren't rate-limited: fetch + base64 them all in parallel
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(image_urls))) as executor:
+            all_images = [img for img in executor.map(download_b64, image_urls) if img]
         
+        _circuit.record(bool(all_images))
         if all_images:
             logger.info(f"Successfully generated {len(all_images)} images with Freepik")
             return {
@@ -107,14 +169,16 @@ def generate_image_with_freepik(prompt: str, num_images: int = 1, style: str = "
                 'error': 'No images generated from Freepik'
             }
             
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         error_msg = "Freepik request timeout"
         logger.error(error_msg)
+        _circuit.record(False)
         return {'status': 'failed', 'error': error_msg}
     
     except Exception as e:
         error_msg = f"Freepik generation failed: {str(e)}"
         logger.error(error_msg)
+        _circuit.record(False)
         return {'status': 'failed', 'error': error_msg}
 
 
@@ -130,18 +194,16 @@ def generate_collage_images_with_freepik(text_content: str, num_images: int = 4)
     Returns:
         dict: {
             'status': 'success' or 'failed',
-            'images': [base64_string, ...],
+            'images': [base64_bytes, ...],
             'error': error message if failed
         }
     """
     try:
         # Extract key themes from text
-        text_preview = text_content[:500] if len(text_content) > 500 else text_content
+        text_preview = text_content[:500]
         
         # Create a visual prompt
-        prompt = f"""Professional business image representing: {text_preview}. 
-        High quality, modern, corporate style, professional photography. 
-        Clean composition, no text overlays."""
+        prompt = _FREEPIK_PROMPT_TMPL.format(text_preview)
         
         # Generate images with photo style
         result = generate_image_with_freepik(prompt, num_images=num_images, style="photo")
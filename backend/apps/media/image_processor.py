@@ -4,7 +4,9 @@ Handles multi-image uploads, creates professional collages with frames
 """
 import logging
 import io
+import concurrent.futures
 from typing import List, Tuple, Dict, Optional
+import numpy as np
 from PIL import Image, ImageDraw, ImageFilter, ImageFont, ImageEnhance
 import os
 from django.core.files.base import ContentFile
@@ -12,6 +14,38 @@ from django.core.files.uploadedfile import InMemoryUploadedFile
 
 logger = logging.getLogger(__name__)
 
+# Inner shadow: 8px ramp (alpha 100 at the edge, -12 per pixel), softened with a radius-4 Gaussian
+SHADOW_WIDTH = 8
+SHADOW_BLUR_RADIUS = 4
+# Downscales reduce by whole factors until within 3x of the target before LANCZOS
+# (visually indistinguishable from a straight LANCZOS at this gap)
+RESIZE_REDUCING_GAP = 3.0
+# enhance_image_quality factors (1.0 = unchanged), and the ITU-R 601 weights PIL uses for 'L'
+ENHANCE_SHARPNESS = 1.1
+ENHANCE_CONTRAST = 1.05
+ENHANCE_COLOR = 1.1
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def _shadow_profile() -> np.ndarray:
+    """Blurred shadow alpha by distance from the image edge.
+
+    The shadow is a stack of rectangle outlines, so away from the corners blurring it in 2D
+    is the same as blurring one row of it. That row is blurred once here, with PIL's own
+    GaussianBlur so the edge falloff matches, instead of a full-canvas blur per framed image.
+    """
+    reach = SHADOW_WIDTH + 3 * SHADOW_BLUR_RADIUS
+    dist = np.arange(2 * reach)
+    ramp = np.where(dist < SHADOW_WIDTH, 100 - 12 * dist, 0).astype(np.uint8)
+    strip = Image.fromarray(ramp[None, :], 'L').filter(ImageFilter.GaussianBlur(radius=SHADOW_BLUR_RADIUS))
+    profile = np.asarray(strip)[0, :reach].copy()
+    profile[-1] = 0
+    return profile
+
+
+_SHADOW_PROFILE = _shadow_profile()
+
+
 class ImageProcessor:
     """Professional image collage and frame generator"""
     
@@ -23,6 +57,8 @@ class ImageProcessor:
         'elegant': '#8B7355',
         'vibrant': '#4F46E5'
     }
+    # Same schemes pre-parsed to RGB, so preset frames skip hex parsing per call
+    FRAME_RGB = {name: tuple(int(hex_color[i:i+2], 16) for i in (1, 3, 5)) for name, hex_color in FRAME_COLORS.items()}
     
     @staticmethod
     def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
@@ -33,26 +69,26 @@ class ImageProcessor:
     @staticmethod
     def create_gradient(width: int, height: int, color1: str, color2: str, direction: str = 'vertical') -> Image.Image:
         """Create a gradient image"""
-        base = Image.new('RGB', (width, height))
-        draw = ImageDraw.Draw(base)
+        rgb1 = np.asarray(ImageProcessor.hex_to_rgb(color1), dtype=np.float32)
+        rgb2 = np.asarray(ImageProcessor.hex_to_rgb(color2), dtype=np.float32)
         
-        rgb1 = ImageProcessor.hex_to_rgb(color1)
-        rgb2 = ImageProcessor.hex_to_rgb(color2)
+        # One colour per scanline (i / n, as the old per-line loop), broadcast across the image
+        steps = height if direction == 'vertical' else width
+        t = (np.arange(steps, dtype=np.float32) / steps)[:, None]
+        ramp = (rgb1 + (rgb2 - rgb1) * t).astype(np.uint8)
         
         if direction == 'vertical':
-            for i in range(height):
-                r = int(rgb1[0] + (rgb2[0] - rgb1[0]) * i / height)
-                g = int(rgb1[1] + (rgb2[1] - rgb1[1]) * i / height)
-                b = int(rgb1[2] + (rgb2[2] - rgb1[2]) * i / height)
-                draw.line([(0, i), (width, i)], fill=(r, g, b))
+            pixels = np.broadcast_to(ramp[:, None, :], (height, width, 3))
         else:  # horizontal
-            for i in range(width):
-                r = int(rgb1[0] + (rgb2[0] - rgb1[0]) * i / width)
-                g = int(rgb1[1] + (rgb2[1] - rgb1[1]) * i / width)
-                b = int(rgb1[2] + (rgb2[2] - rgb1[2]) * i / width)
-                draw.line([(i, 0), (i, height)], fill=(r, g, b))
-        
-        return base
+            pixels = np.broadcast_to(ramp[None, :, :], (height, width, 3))
+        return Image.fromarray(np.ascontiguousarray(pixels), 'RGB')
+    
+    @staticmethod
+    def _edge_alpha(length: int) -> np.ndarray:
+        """Shadow alpha along one axis, by distance to the nearer end."""
+        pos = np.arange(length)
+        edge_dist = np.minimum(np.minimum(pos, length - 1 - pos), len(_SHADOW_PROFILE) - 1)
+        return _SHADOW_PROFILE[edge_dist]
     
     @staticmethod
     def add_professional_frame(image: Image.Image, frame_width: int = 40, color: str = 'classic', 
@@ -76,9 +112,10 @@ class ImageProcessor:
                 frame_width = frame_spec.get('width', 40)
                 gradient_colors = frame_spec.get('gradient', None)
                 border_style = frame_spec.get('border_style', 'solid')
+                frame_rgb = None
             else:
                 # Get frame color from predefined schemes
-                frame_color = ImageProcessor.FRAME_COLORS.get(color, ImageProcessor.FRAME_COLORS['classic'])
+                frame_rgb = ImageProcessor.FRAME_RGB.get(color, ImageProcessor.FRAME_RGB['classic'])
                 gradient_colors = None
                 border_style = 'solid'
             
@@ -92,7 +129,11 @@ class ImageProcessor:
                                                        gradient_colors[0], gradient_colors[1], 
                                                        'vertical')
             else:
-                rgb_color = ImageProcessor.hex_to_rgb(frame_color) if frame_color.startswith('#') else (44, 62, 80)
+                if frame_rgb:
+                    rgb_color = frame_rgb
+                else:
+                    # Dynamic colour from a spec
+                    rgb_color = ImageProcessor.hex_to_rgb(frame_color) if frame_color.startswith('#') else (44, 62, 80)
                 framed = Image.new('RGB', (new_width, new_height), rgb_color)
             
             # Add decorative border based on style
@@ -109,22 +150,16 @@ class ImageProcessor:
                     draw.rectangle([corner[0], corner[1], corner[0]+corner_size, corner[1]+corner_size], 
                                  outline=(200, 180, 150), width=3)
             
-            # Add shadow effect (inner shadow)
-            shadow_width = 8
-            shadow = Image.new('RGBA', image.size, (0, 0, 0, 0))
-            shadow_draw = ImageDraw.Draw(shadow)
-            for i in range(shadow_width):
-                alpha = int(100 - (i * 12))
-                shadow_draw.rectangle([i, i, image.width-i, image.height-i], 
-                                    outline=(0, 0, 0, alpha), width=1)
-            shadow = shadow.filter(ImageFilter.GaussianBlur(radius=4))
-            
             # Paste image onto frame
             framed.paste(image, (frame_width, frame_width))
             
-            # Paste shadow
-            if shadow.mode == 'RGBA':
-                framed.paste(shadow, (frame_width, frame_width), shadow)
+            # Add shadow effect (inner shadow): alpha by distance to the nearest edge, then black
+            # pasted through it as a mask. The profile only falls off, so the nearest edge's alpha
+            # is the larger of the row and column alphas: the full-size mask is one uint8 array.
+            height, width = image.height, image.width
+            alpha = np.maximum(ImageProcessor._edge_alpha(height)[:, None], ImageProcessor._edge_alpha(width)[None, :])
+            framed.paste((0, 0, 0), (frame_width, frame_width, frame_width + width, frame_width + height),
+                         Image.fromarray(alpha, 'L'))
             
             return framed
             
@@ -138,6 +173,11 @@ class ImageProcessor:
         try:
             ratio = min(max_width / image.width, max_height / image.height)
             new_size = (int(image.width * ratio), int(image.height * ratio))
+            if new_size == image.size:
+                return image
+            if ratio < 1:
+                # Big downscales: cheap box reduce first, then LANCZOS on the near-target intermediate
+                return image.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=RESIZE_REDUCING_GAP)
             return image.resize(new_size, Image.Resampling.LANCZOS)
         except Exception as e:
             logger.error(f"Resize failed: {e}")
@@ -195,15 +235,18 @@ class ImageProcessor:
             max_cell_width = 800
             max_cell_height = 800
             
-            # Resize all images to fit cells
+            # Resize all images to fit cells, tracking the largest extents as we go
             resized_images = []
+            max_width = max_height = 0
             for img in images:
                 resized = ImageProcessor.resize_maintain_aspect(img, max_cell_width, max_cell_height)
                 resized_images.append(resized)
+                max_width = max(max_width, resized.width)
+                max_height = max(max_height, resized.height)
             
             # Calculate actual cell dimensions based on resized images
-            cell_width = max(img.width for img in resized_images) + spacing
-            cell_height = max(img.height for img in resized_images) + spacing
+            cell_width = max_width + spacing
+            cell_height = max_height + spacing
             
             # Calculate canvas size
             canvas_width = grid_cols * cell_width + spacing
@@ -236,15 +279,21 @@ class ImageProcessor:
         try:
             # Enhance sharpness slightly
             enhancer = ImageEnhance.Sharpness(image)
-            image = enhancer.enhance(1.1)
-            
-            # Enhance contrast slightly
-            enhancer = ImageEnhance.Contrast(image)
-            image = enhancer.enhance(1.05)
-            
-            # Enhance color vibrancy
-            enhancer = ImageEnhance.Color(image)
-            image = enhancer.enhance(1.1)
+            image = enhancer.enhance(ENHANCE_SHARPNESS)
+            
+            # Contrast (around the mean grey) and colour (around each pixel's grey) are both linear
+            # blends, so they are fused into one float pass instead of two full PIL round trips
+            pixels = np.asarray(image, dtype=np.float32)
+            luma = pixels @ LUMA_WEIGHTS
+            mean = luma.mean()
+            luma = luma[..., None]
+            pixels -= luma
+            pixels *= ENHANCE_COLOR
+            pixels += luma - mean
+            pixels *= ENHANCE_CONTRAST
+            pixels += mean
+            np.clip(pixels, 0, 255, out=pixels)
+            image = Image.fromarray(np.rint(pixels).astype(np.uint8), 'RGB')
             
             return image
         except Exception as e:
@@ -253,7 +302,7 @@ class ImageProcessor:
     
     @staticmethod
     def process_uploaded_images(uploaded_files: List[InMemoryUploadedFile], add_frames: bool = True,
-                               frame_specs: Optional[List[Dict]] = None) -> List[dict]:
+                               frame_specs: Optional[List[Dict]] = None, enhance: bool = True) -> List[dict]:
         """
         Process multiple uploaded images with optional AI-generated frame specifications
         
@@ -261,19 +310,28 @@ class ImageProcessor:
             uploaded_files: List of uploaded image files (max 4)
             add_frames: Whether to add professional frames
             frame_specs: Optional list of frame specification dicts for each image
+            enhance: Whether to apply enhance_image_quality (off for cheap previews)
             
         Returns:
-            List of dicts with 'image': PIL Image and 'filename': str
+            List of dicts with 'image': PIL Image, 'filename': str and 'original_rgb': the
+            decoded RGB image before enhancement and framing
         """
-        processed_images = []
+        files = uploaded_files[:4]  # Max 4 images
+        if not files:
+            return []
         
-        for i, file in enumerate(uploaded_files[:4]):  # Max 4 images
+        def process_one(i, file):
             try:
-                # Open image
-                image = Image.open(file)
+                # Open image from one contiguous read of the upload (from the start: it may have
+                # been read already), so decoding runs on a plain BytesIO rather than Django's File proxy
+                file.seek(0)
+                image = Image.open(io.BytesIO(file.read()))
                 
-                # Convert to RGB if necessary
-                if image.mode in ('RGBA', 'LA', 'P'):
+                # Convert to RGB if necessary (a palette with no transparent entry is opaque:
+                # convert it directly, no RGBA intermediate or masked composite)
+                if image.mode == 'P' and 'transparency' not in image.info:
+                    image = image.convert('RGB')
+                elif image.mode in ('RGBA', 'LA', 'P'):
                     background = Image.new('RGB', image.size, (255, 255, 255))
                     if image.mode == 'P':
                         image = image.convert('RGBA')
@@ -282,8 +340,12 @@ class ImageProcessor:
                 elif image.mode != 'RGB':
                     image = image.convert('RGB')
                 
+                # Decoded RGB copy, kept for the unframed collage
+                original_rgb = image
+                
                 # Enhance quality
-                image = ImageProcessor.enhance_image_quality(image)
+                if enhance:
+                    image = ImageProcessor.enhance_image_quality(image)
                 
                 # Add frame if requested
                 if add_frames:
@@ -296,17 +358,28 @@ class ImageProcessor:
                         frame_style = frame_styles[i % len(frame_styles)]
                         image = ImageProcessor.add_professional_frame(image, frame_width=40, color=frame_style)
                 
-                processed_images.append({
+                return {
                     'image': image,
                     'filename': file.name,
-                    'original_size': (image.width, image.height)
-                })
+                    'original_size': (image.width, image.height),
+                    'original_rgb': original_rgb
+                }
                 
             except Exception as e:
                 logger.error(f"Failed to process image {file.name}: {e}")
-                continue
+                return None
         
-        return processed_images
+        # Decode/enhance/frame are C routines that release the GIL, so the images overlap;
+        # map keeps upload order
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(files)) as executor:
+            return [p for p in executor.map(process_one, range(len(files)), files) if p is not None]
+    
+    @staticmethod
+    def output_format(image: Image.Image) -> Tuple[str, str]:
+        """(format, extension) to save a composite as: JPEG for photographic RGB, PNG when it has alpha"""
+        if image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info:
+            return 'PNG', 'png'
+        return 'JPEG', 'jpg'
     
     @staticmethod
     def save_image_to_content_file(image: Image.Image, filename: str, format: str = 'PNG', quality: int = 95) -> ContentFile:
@@ -326,12 +399,12 @@ class ImageProcessor:
             buffer = io.BytesIO()
             
             if format.upper() == 'JPEG':
-                image.save(buffer, format='JPEG', quality=quality, optimize=True)
+                image.save(buffer, format='JPEG', quality=quality, optimize=True,
+                           progressive=True, subsampling='4:2:0')
             else:
                 image.save(buffer, format='PNG', optimize=True)
             
-            buffer.seek(0)
-            return ContentFile(buffer.read(), name=filename)
+            return ContentFile(buffer.getvalue(), name=filename)
             
         except Exception as e:
             logger.error(f"Failed to save image: {e}")
@@ -340,7 +413,8 @@ class ImageProcessor:
     @staticmethod
     def create_professional_collage_with_frames(
         uploaded_files: List[InMemoryUploadedFile],
-        content_text: Optional[str] = None
+        content_text: Optional[str] = None,
+        enhance: bool = True
     ) -> Tuple[ContentFile, List[ContentFile]]:
         """
         Main function to create collage and individual framed images with AI-powered design
@@ -348,6 +422,7 @@ class ImageProcessor:
         Args:
             uploaded_files: List of uploaded image files (max 4)
             content_text: Optional content text for AI design analysis
+            enhance: Whether to enhance the framed images (False for fast drafts/thumbnails)
             
         Returns:
             Tuple of (collage_content_file, list_of_framed_images_content_files)
@@ -372,42 +447,34 @@ class ImageProcessor:
             processed = ImageProcessor.process_uploaded_images(
                 uploaded_files, 
                 add_frames=True, 
-                frame_specs=frame_specs
+                frame_specs=frame_specs,
+                enhance=enhance
             )
             
             if not processed:
                 raise ValueError("No valid images to process")
             
-            # Extract PIL images
-            pil_images = [p['image'] for p in processed]
-            
-            # Create collage from non-framed versions with design specs
-            non_framed_images = []
-            for file in uploaded_files[:4]:
-                try:
-                    img = Image.open(file)
-                    if img.mode != 'RGB':
-                        img = img.convert('RGB')
-                    non_framed_images.append(img)
-                except:
-                    continue
+            # Create collage from the non-framed versions (already decoded above) with design specs
+            non_framed_images = [p['original_rgb'] for p in processed]
             
             collage = ImageProcessor.create_grid_collage(non_framed_images, collage_spec=collage_spec)
             
             # Save collage
+            collage_format, collage_ext = ImageProcessor.output_format(collage)
             collage_file = ImageProcessor.save_image_to_content_file(
                 collage, 
-                'collage.png', 
-                format='PNG'
+                f"collage.{collage_ext}", 
+                format=collage_format
             )
             
             # Save individual framed images
             framed_files = []
             for i, p in enumerate(processed):
+                framed_format, framed_ext = ImageProcessor.output_format(p['image'])
                 framed_file = ImageProcessor.save_image_to_content_file(
                     p['image'],
-                    f"framed_{i+1}.png",
-                    format='PNG'
+                    f"framed_{i+1}.{framed_ext}",
+                    format=framed_format
                 )
                 framed_files.append(framed_file)
             
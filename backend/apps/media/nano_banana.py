@@ -2,12 +2,16 @@
 Nano Banana AI Image Generation Module
 Using Google's Imagen API for AI-powered image generation
 """
-import requests
+import httpx
 import logging
 from django.conf import settings
+from ._http import get_client, CONNECT_TIMEOUT
 
 logger = logging.getLogger(__name__)
 
+# Imagen renders inside the predict call, so the read budget stays long
+GENERATE_TIMEOUT = httpx.Timeout(60, connect=CONNECT_TIMEOUT)
+
 
 def generate_image_with_nano_banana(prompt: str, negative_prompt: str = "", aspect_ratio: str = "1:1", num_images: int = 1):
     """
@@ -30,18 +34,21 @@ def generate_image_with_nano_banana(prompt: str, negative_prompt: str = "", aspe
     api_url = getattr(settings, 'NANO_BANANA_API_URL', 'https://generativelanguage.googleapis.com/v1beta/models/imagen-3.0-generate-001:predict')
     
     try:
+        # One predict call renders every image server-side (never one request per image)
+        count = max(1, min(num_images, 4))
+        
         # Prepare request payload
         payload = {
             "instances": [{
                 "prompt": prompt,
                 "negativePrompt": negative_prompt,
                 "aspectRatio": aspect_ratio,
-                "numberOfImages": min(num_images, 4),
+                "numberOfImages": count,
                 "safetyFilterLevel": "block_some",
                 "personGeneration": "allow_adult"
             }],
             "parameters": {
-                "sampleCount": min(num_images, 4)
+                "sampleCount": count
             }
         }
         
@@ -51,11 +58,13 @@ def generate_image_with_nano_banana(prompt: str, negative_prompt: str = "", aspe
             'Authorization': f'Bearer {api_key}'
         }
         
-        response = requests.post(
-            f"{api_url}?key={api_key}",
+        # Pooled keep-alive client shared with the other image providers
+        response = get_client().post(
+            api_url,
+            params={'key': api_key},
             json=payload,
             headers=headers,
-            timeout=60
+            timeout=GENERATE_TIMEOUT
         )
         
         if response.status_code == 200:
@@ -90,7 +99,7 @@ def generate_image_with_nano_banana(prompt: str, negative_prompt: str = "", aspe
                 'error': error_msg
             }
             
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         error_msg = "Request timeout - image generation took too long"
         logger.error(error_msg)
         return {'status': 'failed', 'error': error_msg}
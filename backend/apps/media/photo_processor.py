@@ -7,6 +7,7 @@ from io import BytesIO
 import base64
 from typing import List, Dict, Optional, Tuple
 import math
+import numpy as np
 
 
 class PhotoProcessor:
@@ -136,33 +137,34 @@ class PhotoProcessor:
         intensity: float = 0.5
     ) -> Image.Image:
         """Add gradient overlay"""
-        gradient = Image.new('RGBA', image.size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(gradient)
+        if direction not in ('bottom', 'top'):
+            # No gradient for other directions (the overlay would be fully transparent)
+            return image.convert('RGBA')
         
-        if direction == 'bottom':
-            for y in range(image.height):
-                alpha = int(255 * intensity * (y / image.height))
-                draw.rectangle([(0, y), (image.width, y + 1)], fill=(*color, alpha))
-        elif direction == 'top':
-            for y in range(image.height):
-                alpha = int(255 * intensity * (1 - y / image.height))
-                draw.rectangle([(0, y), (image.width, y + 1)], fill=(*color, alpha))
+        # One alpha per row, broadcast across the width in a single RGBA buffer
+        rows = np.arange(image.height) / image.height
+        if direction == 'top':
+            rows = 1 - rows
+        alpha = (255 * intensity * rows).astype(np.uint8)
+        
+        rgba = np.empty((image.height, image.width, 4), dtype=np.uint8)
+        rgba[..., :3] = color
+        rgba[..., 3] = alpha[:, None]
+        gradient = Image.fromarray(rgba, 'RGBA')
         
         return Image.alpha_composite(image.convert('RGBA'), gradient)
     
     def add_vignette(self, image: Image.Image, intensity: float = 0.5) -> Image.Image:
         """Add vignette effect"""
-        mask = Image.new('L', image.size, 0)
-        draw = ImageDraw.Draw(mask)
-        
         center_x, center_y = image.width // 2, image.height // 2
         max_radius = math.sqrt(center_x**2 + center_y**2)
         
-        for x in range(image.width):
-            for y in range(image.height):
-                distance = math.sqrt((x - center_x)**2 + (y - center_y)**2)
-                value = int(255 * (1 - (distance / max_radius) * intensity))
-                mask.putpixel((x, y), max(0, min(255, value)))
+        # Radial distance map for the whole image at once (row/column offsets broadcast)
+        xs = np.arange(image.width, dtype=np.float32) - center_x
+        ys = np.arange(image.height, dtype=np.float32) - center_y
+        distance = np.hypot(xs[None, :], ys[:, None])
+        value = 255 * (1 - (distance / max_radius) * intensity)
+        mask = Image.fromarray(np.clip(value, 0, 255).astype(np.uint8), 'L')
         
         vignette_img = image.convert('RGBA')
         vignette_img.putalpha(mask)
@@ -131,9 +131,9 @@ def generate_quote_card(self, text: str, author_handle: str = "@Contexia"):
         )
         
         filename = f"quote_{self.request.id}.png"
-        job.output_file.save(filename, ContentFile(output_io.getvalue()))
+        job.output_file.save(filename, ContentFile(output_io.getvalue()), save=False)
         job.status = 'completed'
-        job.save()
+        job.save(update_fields=['output_file', 'status'])
         
         # Return the URL so the API view can pass it to the frontend
         return {'status': 'success', 'media_url': job.output_file.url}
@@ -151,7 +151,7 @@ def remove_background(self, job_id: int):
         job = MediaJob.objects.get(id=job_id)
         job.status = 'processing'
         job.started_at = timezone.now()
-        job.save()
+        job.save(update_fields=['status', 'started_at'])
         
         input_image = Image.open(job.input_file.path)
         output_image = remove(input_image)
@@ -159,12 +159,12 @@ def remove_background(self, job_id: int):
         with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp:
             output_image.save(tmp.name, 'PNG')
             filename = f"nobg_{Path(job.input_file.path).stem}.png"
-            job.output_file.save(filename, ContentFile(open(tmp.name, 'rb').read()))
+            job.output_file.save(filename, ContentFile(open(tmp.name, 'rb').read()), save=False)
         os.unlink(tmp.name)
         
         job.status = 'completed'
         job.completed_at = timezone.now()
-        job.save()
+        job.save(update_fields=['output_file', 'status', 'completed_at'])
         return {'status': 'success', 'job_id': job_id}
     except Exception as e: return _handle_error(job_id, e)
 
@@ -180,7 +180,7 @@ def upscale_image(self, job_id: int):
         job = MediaJob.objects.get(id=job_id)
         job.status = 'processing'
         job.started_at = timezone.now()
-        job.save()
+        job.save(update_fields=['status', 'started_at'])
         
         input_path = job.input_file.path
         # Model must be downloaded and placed in this directory
@@ -206,13 +206,13 @@ def upscale_image(self, job_id: int):
         with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp:
             cv2.imwrite(tmp.name, upscaled)
             filename = f"upscaled_{Path(input_path).stem}.png"
-            job.output_file.save(filename, ContentFile(open(tmp.name, 'rb').read()))
+            job.output_file.save(filename, ContentFile(open(tmp.name, 'rb').read()), save=False)
         os.unlink(tmp.name)
         
         job.status = 'completed'
         job.completed_at = timezone.now()
         job.result_data = {'method': method}
-        job.save()
+        job.save(update_fields=['output_file', 'status', 'completed_at', 'result_data'])
         return {'status': 'success', 'job_id': job_id}
     except Exception as e: return _handle_error(job_id, e)
 
@@ -225,7 +225,7 @@ def restore_face(self, job_id: int):
         job = MediaJob.objects.get(id=job_id)
         job.status = 'processing'
         job.started_at = timezone.now()
-        job.save()
+        job.save(update_fields=['status', 'started_at'])
         
         img = cv2.imread(job.input_file.path)
         if img is None: raise Exception("Failed to load image")
@@ -245,12 +245,12 @@ def restore_face(self, job_id: int):
         with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp:
             cv2.imwrite(tmp.name, final)
             filename = f"restored_{Path(job.input_file.path).stem}.png"
-            job.output_file.save(filename, ContentFile(open(tmp.name, 'rb').read()))
+            job.output_file.save(filename, ContentFile(open(tmp.name, 'rb').read()), save=False)
         os.unlink(tmp.name)
         
         job.status = 'completed'
         job.completed_at = timezone.now()
-        job.save()
+        job.save(update_fields=['output_file', 'status', 'completed_at'])
         return {'status': 'success', 'job_id': job_id}
     except Exception as e: return _handle_error(job_id, e)
 
@@ -263,7 +263,7 @@ def detect_video_scenes(self, job_id: int):
         job = MediaJob.objects.get(id=job_id)
         job.status = 'processing'
         job.started_at = timezone.now()
-        job.save()
+        job.save(update_fields=['status', 'started_at'])
         
         video_manager = VideoManager([job.input_file.path])
         scene_manager = SceneManager()
@@ -278,7 +278,7 @@ def detect_video_scenes(self, job_id: int):
         job.status = 'completed'
         job.completed_at = timezone.now()
         job.result_data = {'scenes': scenes}
-        job.save()
+        job.save(update_fields=['status', 'completed_at', 'result_data'])
         return {'status': 'success', 'job_id': job_id}
     except Exception as e: return _handle_error(job_id, e)
 
@@ -291,7 +291,7 @@ def transcribe_video(self, job_id: int):
         job = MediaJob.objects.get(id=job_id)
         job.status = 'processing'
         job.started_at = timezone.now()
-        job.save()
+        job.save(update_fields=['status', 'started_at'])
         
         model = whisper.load_model("base")
         result = model.transcribe(job.input_file.path)
@@ -299,7 +299,7 @@ def transcribe_video(self, job_id: int):
         job.status = 'completed'
         job.completed_at = timezone.now()
         job.result_data = {'text': result['text']}
-        job.save()
+        job.save(update_fields=['status', 'completed_at', 'result_data'])
         return {'status': 'success', 'job_id': job_id}
     except Exception as e: return _handle_error(job_id, e)
 
@@ -379,7 +379,7 @@ def generate_ai_images(self, text_content: str, num_images: int = 4, user_id: in
                         "Please update your API keys in the .env file or top up your account balances."
                     )
                     job.result_data = {'error_details': error_details}
-                    job.save()
+                    job.save(update_fields=['status', 'error_message', 'result_data'])
                     
                     logger.error(f"All providers failed for job {job.id}")
                     
@@ -405,7 +405,7 @@ def generate_ai_images(self, text_content: str, num_images: int = 4, user_id: in
         if not image_files:
             job.status = 'failed'
             job.error_message = 'No valid images generated'
-            job.save()
+            job.save(update_fields=['status', 'error_message'])
             return {'status': 'failed', 'error': 'No valid images generated'}
         
         # Create collage and frames using existing processor
@@ -465,7 +465,7 @@ def generate_ai_images(self, text_content: str, num_images: int = 4, user_id: in
             'uploaded_file_id': uploaded_file.id,
             'provider_used': provider_used  # Track which AI provider generated the images
         }
-        job.save()
+        job.save(update_fields=['status', 'completed_at', 'result_data'])
         
         logger.info(f"Successfully generated and processed {len(image_files)} AI images")
         
@@ -492,7 +492,7 @@ def generate_ai_images(self, text_content: str, num_images: int = 4, user_id: in
         logger.error(f"AI image generation failed: {str(e)}")
         job.status = 'failed'
         job.error_message = str(e)
-        job.save()
+        job.save(update_fields=['status', 'error_message'])
         return {'status': 'failed', 'error': str(e)}
 
 
@@ -503,7 +503,7 @@ def _handle_missing_libs(job_id, lib_name):
         job = MediaJob.objects.get(id=job_id)
         job.status = 'failed'
         job.error_message = f"Missing libraries: {lib_name}"
-        job.save()
+        job.save(update_fields=['status', 'error_message'])
     except: pass
     return {'status': 'failed'}
 
@@ -513,6 +513,6 @@ def _handle_error(job_id, e):
         job = MediaJob.objects.get(id=job_id)
         job.status = 'failed'
         job.error_message = str(e)
-        job.save()
+        job.save(update_fields=['status', 'error_message'])
     except: pass
     raise e
\ No newline at end of file
@@ -90,8 +90,12 @@ class ImageGenerator:
         results = []
         for b64_str in base64_images:
             try:
+                # Fal/Freepik hand back raw base64 bytes, which never carry a data URI header
+                if isinstance(b64_str, (bytes, bytearray)):
+                    imgstr = b64_str
+                    ext = 'png'
                 # Clean base64 string if it has header
-                if ';base64,' in b64_str:
+                elif ';base64,' in b64_str:
                     format_str, imgstr = b64_str.split(';base64,')
                     ext = format_str.split('/')[-1]
                 else:
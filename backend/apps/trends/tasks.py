@@ -69,7 +69,7 @@ def scrape_source(self, source: str, max_pages: int = 3):
         job.status = 'completed'
         job.articles_scraped = articles_created
         job.completed_at = timezone.now()
-        job.save()
+        job.save(update_fields=['status', 'articles_scraped', 'completed_at'])
         
         logger.info(f"Scrape complete for {source}: {articles_created} new, {articles_updated} updated")
         
@@ -84,7 +84,7 @@ def scrape_source(self, source: str, max_pages: int = 3):
         job.status = 'failed'
         job.error_message = str(e)
         job.completed_at = timezone.now()
-        job.save()
+        job.save(update_fields=['status', 'error_message', 'completed_at'])
         raise
 
 
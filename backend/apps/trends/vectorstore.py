@@ -59,16 +59,18 @@ class TrendVectorStore:
             logger.error(f"Error adding article {article.id}: {e}")
             return False
 
-    def search(self, query: str, k: int = 10):
+    def search(self, query: str, k: int = 10, query_embedding=None):
         """
         Production-ready vector search using PostgreSQL + pgvector.
         Calculates distance inside the DB for maximum speed.
+        Pass a precomputed query_embedding to skip the embedding call.
         """
         try:
-            # 1. Generate query embedding using AI
-            query_embedding = self.generate_embedding(query)
+            # 1. Generate query embedding using AI (unless the caller already has it)
+            if query_embedding is None:
+                query_embedding = self.generate_embedding(query)
             
-            if not query_embedding:
+            if query_embedding is None or len(query_embedding) == 0:
                 logger.error("Failed to generate query embedding")
                 return []
 
@@ -114,5 +116,10 @@ class TrendVectorStore:
             # allowing the generator to proceed without trends if necessary.
             return []
 
-def get_trend_snippets(topic: str, k: int = 10):
-    return TrendVectorStore().search(topic, k)
\ No newline at end of file
+def get_trend_snippets(topic: str, k: int = 10, query_vec=None):
+    return TrendVectorStore().search(topic, k, query_embedding=query_vec)
+
+
+def embed_topic(topic: str):
+    """Query embedding for a topic, or None; stored on UploadedFile.topic_embedding"""
+    return TrendVectorStore().generate_embedding(topic) or None
\ No newline at end of file
@@ -2,8 +2,10 @@
 Celery configuration for TrendMaster AI
 """
 import os
+import sys
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
@@ -37,6 +39,23 @@ app.conf.beat_schedule = {
     },
 }
 
+@worker_process_init.connect
+def warm_openai_clients(**kwargs):
+    """Build each prefork child's agents loop and pooled AsyncOpenAI client before its first task."""
+    from apps.generator import ai_wrapper
+    if ai_wrapper.AI_PROVIDER == 'openai':
+        from apps.generator.openai_wrapper import warm_clients
+        warm_clients()
+
+
+@worker_process_shutdown.connect
+def close_openai_clients(**kwargs):
+    """Close pooled OpenAI connections; prefork children exit without running atexit hooks."""
+    openai_wrapper = sys.modules.get('apps.generator.openai_wrapper')
+    if openai_wrapper is not None:
+        openai_wrapper.close_clients()
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')